@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api_model import Configuration
 from file import JSONFileWrapper
-from recording import Recording, SYNC_VERSIONS
+from recording import Recording, RecordingCache, SYNC_VERSIONS
 import json
 from functools import lru_cache
 
@@ -25,15 +25,39 @@ with open( API_CONFIGURATION_FILE ) as file:
     list_M = set()
     list_d = set()
 
+    # index of the recording files by (M, K, N, d) and, for each parameter, index of the recording files of the
+    # configurations which only differ by this parameter, ordered by its value
+    PARAMETERS = ["M", "K", "N", "d"]
+    fragment_by_parameters = {}
+    fragments_by_swept_parameter = { parameter: {} for parameter in PARAMETERS }
+
     for input_filename, input_entry in fragments.items():
         list_N.add(input_entry["input"]["N"])
         list_K.add(input_entry["input"]["K"])
         list_M.add(input_entry["input"]["M"])
         list_d.add(input_entry["input"]["d"])
 
+        input = input_entry["input"]
+        output = DATA_DIRECTORY + "/" + input_entry["output"]
+        fragment_by_parameters[tuple(input[parameter] for parameter in PARAMETERS)] = output
+        for swept_parameter in PARAMETERS:
+            fixed_parameters = tuple(input[parameter] for parameter in PARAMETERS if parameter != swept_parameter)
+            fragments_by_swept_parameter[swept_parameter].setdefault(fixed_parameters, []).append((input[swept_parameter], output))
+
+    for fragments_by_fixed_parameters in fragments_by_swept_parameter.values():
+        for swept_fragments in fragments_by_fixed_parameters.values():
+            swept_fragments.sort()
+
     list_N = sorted(list_N)
     list_K = sorted(list_K)
     list_M = sorted(list_M)
+    list_d = sorted(list_d)
+
+    # the recordings read by the requests, a dashboard update requesting the same recording several times
+    recording_cache = RecordingCache(
+        max_entries=configuration.get("recording-cache-entries", 32),
+        max_bytes=configuration.get("recording-cache-bytes", 1 << 30),
+    )
 
     possible_configurations = {
         "list_N": list_N,
@@ -63,21 +87,35 @@ def home(): return "No Failure"
 
 
 
+def read_recording( output ) -> Recording:
+    return recording_cache.get( output )
+
 def read_recording_from_parameters( M, K, N, d ):
-    for input_filename, input_entry in fragments.items():
-        input = input_entry['input']
-        if input["M"] == M and input["K"] == K and input["N"] == N and input["d"] == d:
-            output = DATA_DIRECTORY + "/" + input_entry["output"]
-            recording = Recording.from_file( output )
-            return recording
-    raise Exception("Unkown configuration")
+    output = fragment_by_parameters.get((M, K, N, d))
+    if output is None:
+        raise Exception("Unkown configuration")
+    return read_recording( output )
 
+def read_swept_recordings( swept_parameter, **fixed_parameters ):
+    """Returns the values of the swept parameter, in order, and the recordings of the configurations."""
+    key = tuple(fixed_parameters[parameter] for parameter in PARAMETERS if parameter != swept_parameter)
+    swept_fragments = fragments_by_swept_parameter[swept_parameter].get(key, [])
+    return [value for value, _ in swept_fragments], [read_recording(output) for _, output in swept_fragments]
 
 
 
 
 
 
+
+@app.get("/api/cache/statistics")
+def cache_statistics():
+    """
+    URL: /cache/statistics
+    Description: Returns the hits, misses, invalidations and evictions of the cache of recordings, and its size.
+    """
+    return recording_cache.statistics()
+
 @app.get("/api/parameters/values")
 def param_values():
     return possible_configurations
@@ -116,30 +154,43 @@ def times( M : int, N : int, K : int, d : int, algorithm : str, algorithm_securi
         algorithm_security=algorithm_security
     )
 
+@app.get("/api/cumulative-communication/sync")
+def communication( M : int, N : int, K : int, d : int, algorithm : str, algorithm_security : str ):
+    """
+    Description: Return the bytes exchanged since the beginning at each time step.
+    """
+    recording = read_recording_from_parameters(
+        M=M,
+        K=K,
+        N=N,
+        d=d,
+    )
+
+    return recording.get_cumulative_communication_by_sync(
+        algorithm=algorithm,
+        algorithm_security=algorithm_security
+    )
+
 def get_algorithm_version(algorithm_security, algorithm_synchronization):
     return f"{algorithm_security}.{algorithm_synchronization}"
 
 @app.get("/api/times/M")
 def test( K : int, N : int, d : int, algorithm : str, algorithm_security : str ):
 
+    param_values, recordings = read_swept_recordings( "M", K=K, N=N, d=d )
+
     res = {}
     for algorithm_synchronization in SYNC_VERSIONS:
         algorithm_version = get_algorithm_version(algorithm_security, algorithm_synchronization)
 
         times = []
-        for M in list_M:
-            recording = read_recording_from_parameters(
-                M=M,
-                K=K,
-                N=N,
-                d=d,
-            )
+        for recording in recordings:
             times.append( recording.root.get([ algorithm, algorithm_version, "execution-time" ]) )
 
 
         res[algorithm_synchronization] = {
             "param_name": "M",
-            "param_values": list_M,
+            "param_values": param_values,
             "times": times,
         }
     return res
@@ -148,24 +199,20 @@ def test( K : int, N : int, d : int, algorithm : str, algorithm_security : str )
 @app.get("/api/times/K")
 def test( M : int, N : int, d : int, algorithm : str, algorithm_security : str ):
 
+    param_values, recordings = read_swept_recordings( "K", M=M, N=N, d=d )
+
     res = {}
     for algorithm_synchronization in SYNC_VERSIONS:
         algorithm_version = get_algorithm_version(algorithm_security, algorithm_synchronization)
 
         times = []
-        for K in list_K:
-            recording = read_recording_from_parameters(
-                M=M,
-                K=K,
-                N=N,
-                d=d,
-            )
+        for recording in recordings:
             times.append( recording.root.get([ algorithm, algorithm_version, "execution-time" ]) )
 
 
         res[algorithm_synchronization] = {
             "param_name": "K",
-            "param_values": list_K,
+            "param_values": param_values,
             "times": times,
         }
     return res
@@ -174,18 +221,14 @@ def test( M : int, N : int, d : int, algorithm : str, algorithm_security : str )
 @app.get("/api/times/d")
 def test( M : int, N : int, K : int, algorithm : str, algorithm_security : str ):
 
+    param_values, recordings = read_swept_recordings( "d", M=M, K=K, N=N )
+
     res = {}
     for algorithm_synchronization in SYNC_VERSIONS:
         algorithm_version = get_algorithm_version(algorithm_security, algorithm_synchronization)
 
         times = []
-        for d in list_d:
-            recording = read_recording_from_parameters(
-                M=M,
-                K=K,
-                N=N,
-                d=d,
-            )
+        for recording in recordings:
             #raise Exception(recording.root.tree_of_keys())
             #raise Exception(recording.filename + " " + str(recording.root.keys()))
             assert algorithm in recording.root.keys(), "File " + recording.filename + f" does not contains {algorithm} entry, found entries: " + str(recording.root.keys())
@@ -195,7 +238,7 @@ def test( M : int, N : int, K : int, algorithm : str, algorithm_security : str )
 
         res[algorithm_synchronization] = {
             "param_name": "d",
-            "param_values": list_d,
+            "param_values": param_values,
             "times": times,
         }
     return res
@@ -204,24 +247,20 @@ def test( M : int, N : int, K : int, algorithm : str, algorithm_security : str )
 @app.get("/api/times/N")
 def test( M : int, d : int, K : int, algorithm : str, algorithm_security : str ):
 
+    param_values, recordings = read_swept_recordings( "N", M=M, K=K, d=d )
+
     res = {}
     for algorithm_synchronization in SYNC_VERSIONS:
         algorithm_version = get_algorithm_version(algorithm_security, algorithm_synchronization)
 
         times = []
-        for N in list_N:
-            recording = read_recording_from_parameters(
-                M=M,
-                K=K,
-                N=N,
-                d=d,
-            )
+        for recording in recordings:
             times.append( recording.root.get([ algorithm, algorithm_version, "execution-time" ]) )
 
 
         res[algorithm_synchronization] = {
             "param_name": "N",
-            "param_values": list_N,
+            "param_values": param_values,
             "times": times,
         }
     return res
@@ -283,6 +322,41 @@ def times( M : int, N : int, K : int, d : int, algorithm : str, algorithm_securi
         algorithm_security=algorithm_security
     )
 
+@app.get("/api/component-execution-time/phases")
+def phases( M : int, N : int, K : int, d : int, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+    """
+    Description: Return the time spent by each entity in each phase, to be stacked.
+    """
+    recording = read_recording_from_parameters(
+        M=M,
+        K=K,
+        N=N,
+        d=d,
+    )
+
+    return recording.get_phase_time_by_entity(
+        algorithm=algorithm,
+        algorithm_security=algorithm_security,
+        algorithm_synchronization=algorithm_synchronization
+    )
+
+@app.get("/api/turn/turns")
+def turns( M : int, N : int, K : int, d : int, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+    """
+    URL: /turn/turns
+    Description: Returns the turns at which the turn-by-turn values have been recorded, and the recording schedule.
+    """
+    recording = read_recording_from_parameters(
+        M=M,
+        K=K,
+        N=N,
+        d=d,
+    )
+    return {
+        "turns": recording.get_recorded_turns( algorithm, algorithm_security, algorithm_synchronization ),
+        "recording-schedule": recording.get_recording_schedule( algorithm, algorithm_security, algorithm_synchronization ),
+    }
+
 @app.get("/api/turn/theta-mse")
 async def home( M : int, N : int, K : int, d : int, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
     """
@@ -326,7 +400,9 @@ def times( M : int, N : int, K : int, d : int, algorithm : str, algorithm_securi
         }
         for algorithm_synchronization in SYNC_VERSIONS
     }
-    res["turns"] = list(range(1, N + 1))
+    # the turns are the same for all the synchronization versions, recorded with the same schedule
+    res["turns"] = recording.get_recorded_turns(algorithm, algorithm_security, SYNC_VERSIONS[0])
+    res["recording-schedule"] = recording.get_recording_schedule(algorithm, algorithm_security, SYNC_VERSIONS[0])
     return res
     
 
@@ -1,12 +1,36 @@
+ARM_SCORING_LOOP = "loop"
+ARM_SCORING_VECTORIZED = "vectorized"
+
+INVERSE_DIRECT = "direct"
+INVERSE_INCREMENTAL = "incremental"
+
+ENGINE_NAIVE = "naive"
+ENGINE_BATCHED = "batched"
+ENGINE_PROCESSES = "processes"
+ENGINE_ASYNC = "async"
+
+DEFAULT_PAILLIER_KEY_LENGTH = 3072
+
 class ExecutionConfiguration:
   """
   Execution Configuration contains information that are used to launch an algorithm.
   """
-  def __init__(self, algorithm, algorithm_security, algorithm_sync, nbIteration, iteration, seed) -> None:
+  def __init__(self, algorithm, algorithm_security, algorithm_sync, nbIteration, iteration, seed, arm_scoring = ARM_SCORING_VECTORIZED, inverse_update = INVERSE_DIRECT, reinversion_period = 50, engine = ENGINE_NAIVE, workers = None, network_latency = 0.01, network_bandwidth = 125e6, aggregation_fan_out = 4, paillier_key_length = DEFAULT_PAILLIER_KEY_LENGTH, sync_threshold = 2.0, recording_schedule = "every:1") -> None:
       self.algorithm = algorithm
       self.algorithm_version = f"{algorithm_security}.{algorithm_sync}"
       self.algorithm_security = algorithm_security
       self.algorithm_sync = algorithm_sync
       self.nbIteration = nbIteration
       self.iteration = iteration
-      self.seed = seed
\ No newline at end of file
+      self.seed = seed
+      self.arm_scoring = arm_scoring
+      self.inverse_update = inverse_update
+      self.reinversion_period = reinversion_period
+      self.engine = engine
+      self.workers = workers
+      self.network_latency = network_latency
+      self.network_bandwidth = network_bandwidth
+      self.aggregation_fan_out = aggregation_fan_out
+      self.paillier_key_length = paillier_key_length
+      self.sync_threshold = sync_threshold
+      self.recording_schedule = recording_schedule
@@ -3,7 +3,20 @@ from os import mkdir, read
 from pathlib import Path
 import os
 from posixpath import abspath
+from shutil import rmtree
 import json
+import numpy
+
+# recording file formats, the columnar format being recognized by the suffix of its directory
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+COLUMNAR_SUFFIX = ".columns"
+COLUMNAR_HEADER_FILENAME = "header.json"
+COLUMN_KEY = "$column"
+# the columns of each write are stored in a new version directory, referred to by the header
+COLUMNAR_VERSION_PREFIX = "columns-"
+# below a file system block, a series costs less inline in the header than in a file of its own
+COLUMN_MIN_BYTES = 4096
 
 class IOFileWrapper:
     """Recording object allows to store easily data on file without checking if the file exists or not."""
@@ -20,8 +33,13 @@ class IOFileWrapper:
             parent_dir = Path(self.dirname)
             parent_dir.mkdir(parents=True, exist_ok=True)
 
-        with open(self.absolute_path, 'w') as file:
+        # the data is written aside then renamed, such that a crash never leaves a partially written file
+        temporary_path = f"{self.absolute_path}.tmp"
+        with open(temporary_path, 'w') as file:
             self._encode_data(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.absolute_path)
 
 
     def read(self):
@@ -44,8 +62,112 @@ class IOFileWrapper:
 
 class JSONFileWrapper(IOFileWrapper):
     """JSON File Wrapper Object"""
-    def _encode_data( self, data, file ): file.write(json.dumps(data))
+    def _encode_data( self, data, file ): file.write(json.dumps(data, default=encode_array))
     def _decode_data( self, file ): return json.loads("".join(file.readlines()))
 
 
-            
+def encode_array( value ):
+    """Encodes the arrays, e.g. the memory-mapped series of a columnar recording, as lists."""
+    if isinstance(value, numpy.ndarray): return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ColumnarFileWrapper(IOFileWrapper):
+    """
+    Columnar File Wrapper Object: a directory where each large numeric series of the data (e.g. a turn-by-turn
+    column) is stored as a typed array in a .npy file, the remaining data, small series included, being stored in a
+    JSON header which refers to the arrays. The arrays are memory-mapped when read, such that slicing a series only
+    reads the slice.
+    """
+    def write(self, data) -> None:
+        path = Path(self.absolute_path)
+        self.recover()
+        if path.exists() and not path.is_dir():
+            raise Exception("Can only write columns in a directory")
+        path.mkdir(parents=True, exist_ok=True)
+
+        # the columns are written in a new version directory, then the header referring to them is swapped, such that
+        # a crash leaves either the previous or the new version, and a reader never sees a partially written one
+        versions = [int(entry.name[len(COLUMNAR_VERSION_PREFIX):]) for entry in path.glob(f"{COLUMNAR_VERSION_PREFIX}*")]
+        version_directory = f"{COLUMNAR_VERSION_PREFIX}{max(versions, default=0) + 1}"
+        (path / version_directory).mkdir()
+
+        column_filenames = []
+        def extract_columns( node ):
+            if type(node) == dict:
+                return { key: extract_columns(value) for key, value in node.items() }
+            column = as_column(node)
+            if column is None or column.nbytes < COLUMN_MIN_BYTES: return node
+            column_filename = f"{version_directory}/{len(column_filenames)}.npy"
+            with open(path / column_filename, 'wb') as file:
+                numpy.save(file, column)
+                file.flush()
+                os.fsync(file.fileno())
+            column_filenames.append(column_filename)
+            return { COLUMN_KEY: column_filename }
+
+        header = extract_columns(data)
+        temporary_path = path / f"{COLUMNAR_HEADER_FILENAME}.tmp"
+        with open(temporary_path, 'w') as file:
+            file.write(json.dumps(header, default=encode_array))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path / COLUMNAR_HEADER_FILENAME)
+
+        # the previous versions are no longer referred to, the memory-mapped columns of their readers stay valid
+        for entry in path.iterdir():
+            if entry.name in [COLUMNAR_HEADER_FILENAME, version_directory]: continue
+            if entry.is_dir(): rmtree(entry)
+            else: entry.unlink()
+
+    def read(self):
+        path = Path(self.absolute_path)
+        self.recover()
+        if not path.exists():
+            raise Exception(f"File not found: {self.absolute_path}")
+
+        def load_columns( node ):
+            if type(node) != dict: return node
+            if list(node.keys()) == [COLUMN_KEY]:
+                return numpy.load(path / node[COLUMN_KEY], mmap_mode='r')
+            return { key: load_columns(value) for key, value in node.items() }
+
+        with open(path / COLUMNAR_HEADER_FILENAME, 'r') as file:
+            return load_columns(json.loads(file.read()))
+
+    def exists(self) -> bool:
+        return super().exists() or Path(f"{self.absolute_path}.old").exists()
+
+    def recover(self) -> None:
+        """
+        Recovers from a write of a former version, which renamed the directory aside before renaming the new one: the
+        directory renamed aside is restored if the new one is missing, and removed otherwise.
+        """
+        path, previous_path = Path(self.absolute_path), Path(f"{self.absolute_path}.old")
+        try:
+            if not path.exists(): previous_path.replace(path)
+            elif previous_path.exists(): rmtree(previous_path)
+        except FileNotFoundError:
+            # recovered meanwhile by another reader
+            pass
+        temporary_path = Path(f"{self.absolute_path}.tmp")
+        if temporary_path.exists(): rmtree(temporary_path, ignore_errors=True)
+
+
+def as_column( value ):
+    """Returns the typed array of a numeric series, or None if the value is not a numeric series."""
+    if type(value) != list and not isinstance(value, numpy.ndarray): return None
+    try:
+        column = numpy.asarray(value)
+    except ValueError:
+        # series of series which have not the same length
+        return None
+    if column.size == 0 or column.dtype.kind not in "biuf": return None
+    return column
+
+
+def file_wrapper( filename ) -> IOFileWrapper:
+    """Returns the wrapper of a recording file, in the columnar format if its name ends with the columnar suffix."""
+    if filename.endswith(COLUMNAR_SUFFIX):
+        return ColumnarFileWrapper(filename)
+    return JSONFileWrapper(filename)
@@ -5,24 +5,33 @@ from os import stat
 from typing import List, Tuple
 from numpy import asarray, dot, matmul, testing
 import numpy
-from pipe import Pipe, select, transpose
-from numpy.random import uniform
+from pipe import Pipe, transpose
 from numpy.linalg import pinv as invert_matrix
 
 from phe import PaillierPrivateKey, PaillierPublicKey, generate_paillier_keypair, EncryptedNumber
 
 from data import DataWrapper
-from time import time
-from random import seed as setseed
+from time import time, perf_counter
 from switch import Switch
-from recording import Recording, RecursiveMap
-from execution_config import ExecutionConfiguration
-from tensor import Tensor
+from recording import Recording, RecordingSchedule, TurnRecorder
+from execution_config import ExecutionConfiguration, ARM_SCORING_LOOP, ARM_SCORING_VECTORIZED, INVERSE_INCREMENTAL, ENGINE_NAIVE, ENGINE_BATCHED, ENGINE_PROCESSES, ENGINE_ASYNC, DEFAULT_PAILLIER_KEY_LENGTH
+from tensor import Tensor, FixedPointCodec
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from os import urandom
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives import hashes
+from os import urandom, getpid
 from pathlib import Path
 from numpy.core.fromnumeric import argmax
 from random import random, seed, randint, choices
+from multiprocessing import Pipe as ProcessPipe, Process, cpu_count
+from multiprocessing.sharedctypes import RawArray
+from traceback import format_exc
+from pickle import dumps, loads
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
 
 
 class SeedableRandomGenerator:
@@ -55,32 +64,117 @@ class SeedableRandomGenerator:
         return value
 
 
+def splitmix64(z):
+    """Returns the SplitMix64 finalizer of an array of 64-bit unsigned integers."""
+    with numpy.errstate(over="ignore"):
+        z = z + numpy.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        return z ^ (z >> numpy.uint64(31))
+
+
+class CounterBasedRandomGenerator:
+    """
+    Random number generator whose output only depends on a seed and a counter, such that values can be
+    drawn in any order, one by one or by blocks, without relying on a global state.
+    """
+
+    def __init__(self, seed):
+        self.key = splitmix64(numpy.asarray(seed, dtype=numpy.uint64))
+
+    def bits(self, counters) -> numpy.ndarray:
+        """Returns a random 64-bit unsigned integer for each given counter."""
+        return splitmix64(self.key ^ splitmix64(numpy.asarray(counters, dtype=numpy.uint64)))
+
+    def uniform(self, low, high, counters) -> numpy.ndarray:
+        """Returns a random float between low (included) and high (excluded) for each given counter."""
+        unit = (self.bits(counters) >> numpy.uint64(11)) * (1.0 / (1 << 53))
+        return low + (high - low) * unit
+
+
+class KeystreamGenerator:
+    """
+    Cryptographic random generator expanding a 256-bit key with AES in counter mode, such that values can be drawn
+    from any counter block without relying on a global state.
+    """
+
+    def __init__(self, key: bytes):
+        self.algorithm = algorithms.AES(key)
+
+    def bits(self, counter_block: int, count) -> numpy.ndarray:
+        """Returns count random 64-bit unsigned integers, read from the keystream starting at a 128-bit counter block."""
+        encryptor = Cipher(self.algorithm, modes.CTR(counter_block.to_bytes(16, "big"))).encryptor()
+        return numpy.frombuffer(encryptor.update(bytes(8 * count)), dtype="<u8")
+
+
+class RewardNoise:
+    """
+    Noise added to the rewards, made of exactly one independent value per (data owner, turn) and pre-generated
+    as a N x M block such that pulling an arm is an array lookup.
+    """
+
+    def __init__(self, seed, R, N, M):
+        self.generator = CounterBasedRandomGenerator(seed)
+        self.R = R
+        self.block = self.generate(turns=numpy.arange(N + 1)[:, None], data_owners=numpy.arange(M)[None, :])
+
+    def generate(self, turns, data_owners) -> numpy.ndarray:
+        """Returns the noise of the given (broadcastable) turns and data owners."""
+        counters = (numpy.asarray(turns, dtype=numpy.uint64) << numpy.uint64(32)) | numpy.asarray(data_owners, dtype=numpy.uint64)
+        return self.generator.uniform(-self.R, self.R, counters)
+
+    def value(self, data_owner_index, t) -> float:
+        return self.block[t, data_owner_index]
+
+    def turn(self, t) -> numpy.ndarray:
+        return self.block[t]
+
+
 LINUCB_ALGORITHM = "linucb"
 PLAINTEXT_VERSION = "plaintext-version"
 SINGLE_PAILLIER_VERSION = "single-paillier-version"
 MASKED_VERSION = "masked-version"
+TREE_VERSION = "tree-version"
+MASKED_TREE_VERSION = "masked-tree-version"
+NUMPY_MASKED_VERSION = "numpy-masked-version"
+PACKED_PAILLIER_VERSION = "packed-paillier-version"
+PAIRWISE_MASKED_VERSION = "pairwise-masked-version"
+
+SECURITY_VERSIONS = [
+    PLAINTEXT_VERSION, MASKED_VERSION, SINGLE_PAILLIER_VERSION, PACKED_PAILLIER_VERSION, NUMPY_MASKED_VERSION, TREE_VERSION,
+    PAIRWISE_MASKED_VERSION, MASKED_TREE_VERSION
+]
 
 REGULAR_STEPS_SYNC = "regular-steps"
 FOUR_STEPS_SYNC = "four-steps"
 TWO_STEPS_SYNC = "two-steps"
 EACH_STEPS_SYNC = "each-step"
 NO_SYNC = "no-sync"
+ADAPTIVE_SYNC = "adaptive"
 
 
 SYNC_VERSIONS = [NO_SYNC, EACH_STEPS_SYNC, TWO_STEPS_SYNC, FOUR_STEPS_SYNC]
+ALL_SYNC_VERSIONS = SYNC_VERSIONS + [ADAPTIVE_SYNC]
 
-def linucb_versions( with_security  : bool ):
-    if with_security:
+def linucb_versions( with_security  : bool, securities : List[str] = None, syncs : List[str] = None ):
+    syncs = syncs if syncs else SYNC_VERSIONS
+    if securities:
+        return [
+            (security, sync)
+            for security in securities
+            for sync in syncs
+        ]
+    elif with_security:
         return [
             (security, sync)
             for security in [PLAINTEXT_VERSION, MASKED_VERSION]
-            for sync in SYNC_VERSIONS
+            for sync in syncs
         ]
     else:
         return [
             (security, sync)
             for security in [PLAINTEXT_VERSION]
-            for sync in SYNC_VERSIONS
+            for sync in syncs
         ]
 
 # ------------------------------------------------------------------------
@@ -98,6 +192,7 @@ def paillier_decrypt_tensor(sk: PaillierPrivateKey, tensor: Tensor):
 
 
 import json
+import struct
 
 AES_GCM_CIPHERTEXT = bytes
 
@@ -107,39 +202,163 @@ def aes_gcm_encrypt_tensor(cipher: AESGCM, nonce, tensor: Tensor) -> AES_GCM_CIP
     return cipher.encrypt(nonce=nonce, data=raw_data, associated_data=b"")
 
 
-def aes_gcm_decrypt_tensor(cipher: AESGCM, nonce, ciphertext: AES_GCM_CIPHERTEXT) -> Tensor:
+def aes_gcm_decrypt_tensor(cipher: AESGCM, nonce, ciphertext: AES_GCM_CIPHERTEXT, dtype=None) -> Tensor:
     raw_data = cipher.decrypt(nonce=nonce, data=ciphertext, associated_data=b"").decode()
-    return Tensor(json.loads(raw_data))
+    return Tensor(numpy.array(json.loads(raw_data), dtype=dtype))
+
+
+# A binary frame is made of a header (dtype and shape of the array), the nonce and the encrypted raw buffer of the
+# array. The header is not encrypted but authenticated as associated data, such that the buffer of the array is
+# directly encrypted and decrypted without any serialization.
+FRAME_HEADER_FORMAT = "<16sB"
+FRAME_NONCE_LENGTH = 12
+
+def aes_gcm_encrypt_array(cipher: AESGCM, array: numpy.ndarray) -> AES_GCM_CIPHERTEXT:
+    array = numpy.ascontiguousarray(array)
+    header = struct.pack(FRAME_HEADER_FORMAT, array.dtype.str.encode(), array.ndim) + struct.pack(f"<{array.ndim}q", *array.shape)
+    nonce = urandom(FRAME_NONCE_LENGTH)
+    return header + nonce + cipher.encrypt(nonce=nonce, data=memoryview(array).cast("B"), associated_data=header)
+
+
+def aes_gcm_decrypt_array(cipher: AESGCM, frame: AES_GCM_CIPHERTEXT) -> numpy.ndarray:
+    frame = memoryview(frame)
+    dtype, ndim = struct.unpack_from(FRAME_HEADER_FORMAT, frame)
+    header_length = struct.calcsize(FRAME_HEADER_FORMAT) + 8 * ndim
+    shape = struct.unpack_from(f"<{ndim}q", frame, struct.calcsize(FRAME_HEADER_FORMAT))
+    nonce = frame[header_length:header_length + FRAME_NONCE_LENGTH]
+    raw_data = cipher.decrypt(nonce=bytes(nonce), data=frame[header_length + FRAME_NONCE_LENGTH:], associated_data=frame[:header_length])
+    return numpy.frombuffer(raw_data, dtype=numpy.dtype(dtype.rstrip(b"\0").decode())).reshape(shape)
+
+
+PAILLIER_KEYS_DIRECTORY = "/tmp/paillier-keys"
+PAILLIER_KEY_FORMAT = "<HH"
+
+
+def generate_paillier_primes(n_length: int) -> Tuple[int, int]:
+    """Returns the primes p and q of a fresh Paillier key pair, generated in a worker process of the key pool."""
+    _, sk = generate_paillier_keypair(n_length=n_length)
+    return sk.p, sk.q
+
+
+def write_paillier_key(filename, p: int, q: int):
+    """Writes the primes of a Paillier key pair as little-endian bytes, prefixed by their lengths."""
+    p_bytes = p.to_bytes((p.bit_length() + 7) // 8, "little")
+    q_bytes = q.to_bytes((q.bit_length() + 7) // 8, "little")
+    # the key is written aside then renamed, such that a reader never sees a partial key
+    temporary = Path(f"{filename}.tmp")
+    temporary.write_bytes(struct.pack(PAILLIER_KEY_FORMAT, len(p_bytes), len(q_bytes)) + p_bytes + q_bytes)
+    temporary.replace(filename)
+
+
+def read_paillier_key(filename) -> Tuple[int, int]:
+    """Reads the primes of a Paillier key pair written by write_paillier_key."""
+    content = Path(filename).read_bytes()
+    p_length, q_length = struct.unpack_from(PAILLIER_KEY_FORMAT, content)
+    offset = struct.calcsize(PAILLIER_KEY_FORMAT)
+    p = int.from_bytes(content[offset:offset + p_length], "little")
+    q = int.from_bytes(content[offset + p_length:offset + p_length + q_length], "little")
+    return p, q
+
+
+class PaillierKeyPool:
+    """
+    Pool of spare Paillier key pairs, generated ahead of time in a background process and stored on disk
+    until a key id claims them.
+    """
+
+    def __init__(self, directory=PAILLIER_KEYS_DIRECTORY) -> None:
+        self.directory = Path(directory)
+        self.executor = None
+        # the pending generations not yet claimed by a key id, the lock is shared with the executor callbacks
+        self.pending = {}
+        self.lock = Lock()
+        self.nb_spares = 0
+
+    def spares(self, n_length: int) -> List[Path]:
+        return sorted(self.directory.glob(f"spare-{n_length}-*.key"))
+
+    def prefetch(self, n_length: int, count: int = 1):
+        """Starts the generation of key pairs of the given length, until count spares are stored or pending."""
+        with self.lock:
+            pending = self.pending.setdefault(n_length, [])
+            missing = count - len(self.spares(n_length)) - len(pending)
+            if missing <= 0: return
+
+            if self.executor is None: self.executor = ProcessPoolExecutor(max_workers=1)
+            submitted = [self.executor.submit(generate_paillier_primes, n_length) for _ in range(missing)]
+            pending.extend(submitted)
+        for future in submitted:
+            future.add_done_callback(lambda future, n_length=n_length: self.store_spare(n_length, future))
+
+    def store_spare(self, n_length: int, future):
+        """Stores the key pair of a finished generation as a spare, unless a key id already claimed it."""
+        with self.lock:
+            if future not in self.pending.get(n_length, []): return
+            self.pending[n_length].remove(future)
+            if future.cancelled() or future.exception() is not None: return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.nb_spares += 1
+            p, q = future.result()
+            write_paillier_key(self.directory / f"spare-{n_length}-{getpid()}-{self.nb_spares}.key", p, q)
+
+    def take(self, n_length: int) -> Tuple[int, int]:
+        """Returns the primes of a spare key pair, waiting for a pending generation or generating one if none is left."""
+        primes = self.take_spare(n_length)
+        if primes is not None: return primes
+
+        with self.lock:
+            pending = self.pending.get(n_length, [])
+            future = pending.pop(0) if pending else None
+        if future is not None: return future.result()
+
+        # the last pending generation may have been stored as a spare meanwhile
+        primes = self.take_spare(n_length)
+        if primes is not None: return primes
+        return generate_paillier_primes(n_length)
+
+    def take_spare(self, n_length: int):
+        for spare in self.spares(n_length):
+            try:
+                # renaming the spare claims it, even if another process shares the pool
+                claimed = spare.with_suffix(f".{getpid()}.claimed")
+                spare.rename(claimed)
+            except FileNotFoundError:
+                continue
+            p, q = read_paillier_key(claimed)
+            claimed.unlink()
+            return p, q
+        return None
 
 
 class PaillierKeyManager:
     """Key Object Manager allows to create and load key quickly from file"""
 
+    pool = PaillierKeyPool()
+
     @staticmethod
-    def load_or_create(key_id: str) -> Tuple[PaillierPublicKey, PaillierPrivateKey]:
-        # checks that both private and public keys exists, otherwise create a new one
-        # and export it
-        filename = f"/tmp/{key_id}"
-        file = Path(filename)
-        if not file.exists():
-            pk, sk = generate_paillier_keypair()
-            PaillierKeyManager.save(key_id, pk, sk)
-            return pk, sk
+    def filename(key_id: str, n_length: int) -> Path:
+        return PaillierKeyManager.pool.directory / f"{key_id}-{n_length}.key"
 
-        # load the public key
-        with open(filename) as file:
-            line = file.readline()
-            n, p, q = line.split(",") | select(lambda v: int(v))
-            pk = PaillierPublicKey(n)
+    @staticmethod
+    def load_or_create(key_id: str, n_length: int = DEFAULT_PAILLIER_KEY_LENGTH) -> Tuple[PaillierPublicKey, PaillierPrivateKey]:
+        # checks that the key pair exists, otherwise takes one from the pool and export it
+        filename = PaillierKeyManager.filename(key_id, n_length)
+        if not filename.exists():
+            p, q = PaillierKeyManager.pool.take(n_length)
+            pk = PaillierPublicKey(p * q)
             sk = PaillierPrivateKey(pk, p, q)
+            PaillierKeyManager.save(key_id, pk, sk)
+            return pk, sk
 
+        p, q = read_paillier_key(filename)
+        pk = PaillierPublicKey(p * q)
+        sk = PaillierPrivateKey(pk, p, q)
         return pk, sk
 
     @staticmethod
     def save(key_id: str, pk: PaillierPublicKey, sk: PaillierPrivateKey):
-        filename = f"/tmp/{key_id}"
-        with open(filename, "w") as file:
-            file.write(f"{pk.n},{sk.p},{sk.q}")
+        PaillierKeyManager.pool.directory.mkdir(parents=True, exist_ok=True)
+        write_paillier_key(PaillierKeyManager.filename(key_id, pk.n.bit_length()), sk.p, sk.q)
 
 
 class DataOwnerContext:
@@ -147,48 +366,219 @@ class DataOwnerContext:
     pass
 
 
+SERVER_ENTITY = "server"
+
+
 class Timer:
+    """
+    Measures the execution time of an entity with a monotonic high-resolution clock. The time can be broken
+    down into named phases, that can be nested: a nested phase is accounted under the path of its parents.
+    """
+
     def __init__(self) -> None:
         self.time = 0
         self.start = None
+        self.phases = {}
+        self.current_phases = []
 
     def __enter__(self, *args):
-        self.start = time()
+        self.start = perf_counter()
 
     def __exit__(self, *args):
-        self.time += time() - self.start
+        self.time += perf_counter() - self.start
+        self.start = None
+
+    def running(self) -> bool: return self.start is not None
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def add_phase_time(self, path, elapsed):
+        self.phases[path] = self.phases.get(path, 0) + elapsed
+
+    def add_time(self, name, elapsed):
+        """Accounts a time measured outside of the timer, e.g. a simulated one, in a phase of the given name."""
+        self.time += elapsed
+        self.add_phase_time("/".join(self.current_phases + [name]), elapsed)
+
+
+class Phase:
+    """Named phase of a timer, which also runs the timer if it is not already running."""
+
+    def __init__(self, timer, name) -> None:
+        self.timer = timer
+        self.name = name
         self.start = None
+        self.runs_timer = False
+
+    def __enter__(self, *args):
+        self.runs_timer = not self.timer.running()
+        if self.runs_timer: self.timer.__enter__()
+        self.timer.current_phases.append(self.name)
+        self.path = "/".join(self.timer.current_phases)
+        self.start = perf_counter()
+
+    def __exit__(self, *args):
+        self.timer.add_phase_time(self.path, perf_counter() - self.start)
+        self.timer.current_phases.pop()
+        if self.runs_timer: self.timer.__exit__()
+
+
+def new_turn_recorder(execution_config: ExecutionConfiguration, N, M) -> TurnRecorder:
+    """Returns the turn-by-turn recorder of a run, preallocated for the turns of its recording schedule."""
+    schedule = RecordingSchedule.parse(execution_config.recording_schedule)
+    return TurnRecorder(schedule.turns(N), M, schedule=schedule)
+
+
+def register_phases_for_turn(data_by_turn: TurnRecorder, t, timer_server: Timer, data_owners_timers):
+    """Puts the time spent in each phase by the entities since the beginning of the execution."""
+    paths = set([path for timer in data_owners_timers for path in timer.phases])
+    data_by_turn.record_phases(
+        t,
+        data_owners_phases={ path: [timer.phases.get(path, 0) for timer in data_owners_timers] for path in paths },
+        server_phases=timer_server.phases
+    )
+
+
+def data_owner_entity(data_owner_index) -> str: return f"data-owner-{data_owner_index}"
+
+
+def payload_size(payload) -> int:
+    """Returns the number of bytes of a payload once serialized, e.g. an encoded tensor or a list of ciphertexts."""
+    if isinstance(payload, (bytes, bytearray)): return len(payload)
+    if isinstance(payload, Tensor): return payload_size(payload.numpy())
+    if isinstance(payload, numpy.ndarray):
+        if payload.dtype.kind == "O": return sum([payload_size(item) for item in payload.flat])
+        return payload.nbytes
+    if isinstance(payload, numpy.generic): return payload.itemsize
+    if isinstance(payload, EncryptedNumber): return (payload.public_key.nsquare.bit_length() + 7) // 8
+    if isinstance(payload, PackedCiphertexts): return payload_size(payload.ciphertexts)
+    if isinstance(payload, (list, tuple)): return sum([payload_size(item) for item in payload])
+    if isinstance(payload, float): return 8
+    if isinstance(payload, int): return max(1, (payload.bit_length() + 7) // 8)
+    raise Exception(f"Unknown payload type: {type(payload)}")
+
+
+class Traffic:
+    """Counts the serialized bytes sent and received by each entity."""
+
+    def __init__(self) -> None:
+        self.sent = {}
+        self.received = {}
+
+    def send(self, sender, receivers: List[str], payload):
+        """Counts a payload sent once by the sender and received by each receiver."""
+        size = payload_size(payload)
+        self.sent[sender] = self.sent.get(sender, 0) + size
+        for receiver in receivers:
+            self.received[receiver] = self.received.get(receiver, 0) + size
+
+    def sent_bytes(self, entity) -> int: return self.sent.get(entity, 0)
+
+    def received_bytes(self, entity) -> int: return self.received.get(entity, 0)
+
+    def total(self) -> int:
+        """Returns the number of bytes that crossed the network."""
+        return sum(self.sent.values())
+
+    def snapshot(self):
+        traffic = Traffic()
+        traffic.sent, traffic.received = dict(self.sent), dict(self.received)
+        return traffic
+
+
+def register_communication_for_turn(data_by_turn: TurnRecorder, t, traffic: Traffic, M):
+    """Puts the bytes sent and received by the entities since the beginning of the execution."""
+    data_owners = [data_owner_entity(data_owner_index) for data_owner_index in range(M)]
+    data_by_turn.record_communication(
+        t,
+        data_owners_sent=[traffic.sent_bytes(entity) for entity in data_owners],
+        data_owners_received=[traffic.received_bytes(entity) for entity in data_owners],
+        server_sent=traffic.sent_bytes(SERVER_ENTITY),
+        server_received=traffic.received_bytes(SERVER_ENTITY)
+    )
 
 
 class SecurityPolicy:
     """The security policy determines which security guarantees must be applied"""
 
+    # whether the result of the server is sent once to all the data owners rather than once per data owner
+    broadcast = False
+
+    def __init__(self) -> None:
+        self.traffic = Traffic()
+
     def init(self, timer_server: Timer, data_owners: List[DataOwnerContext]): pass
 
     def time_step_begin(self, time_step, data_owner: DataOwnerContext): pass
 
+    def statistics(self) -> dict:
+        """Returns the statistics collected by the security policy during the execution."""
+        return {}
+
+    def traffic_statistics(self) -> dict:
+        """Returns the bytes uploaded to and downloaded from the server, as counted by the traffic."""
+        return {
+            "uploaded-bytes": self.traffic.received_bytes(SERVER_ENTITY),
+            "downloaded-bytes": self.traffic.sent_bytes(SERVER_ENTITY),
+        }
+
     @abstractmethod
     def synchronize(timer_server: Timer, data_owners: List[DataOwnerContext]): pass
 
+    def aggregate(self, timer_server: Timer, list_A, list_b):
+        """Runs the server on the uploads of the data owners, accounting its time to the server timer."""
+        with timer_server.phase("aggregation"):
+            return self.server(list_A, list_b)
+
+    def delivered(self, data_owner_index, result):
+        """Returns the part of a result of the server that is sent to a data owner."""
+        return result
+
+    def upload(self, data_owner_index, payload):
+        self.traffic.send(data_owner_entity(data_owner_index), [SERVER_ENTITY], payload)
+
+    def download(self, results, M):
+        """Counts the results of the server sent to the M data owners."""
+        if self.broadcast:
+            self.traffic.send(SERVER_ENTITY, [data_owner_entity(index) for index in range(M)], results)
+        else:
+            for data_owner_index in range(M):
+                payload = [self.delivered(data_owner_index, result) for result in results]
+                self.traffic.send(SERVER_ENTITY, [data_owner_entity(data_owner_index)], payload)
+
 
 class CentralizedAdditionSecurityPolicy(SecurityPolicy):
     def synchronize(self, timer_server: Timer, data_owners: List[DataOwnerContext]):
         # perform the pre-processing stage
         list_A, list_b = [], []
         for data_owner_index, data_owner in enumerate(data_owners):
-            with data_owner.timer:
-                list_A.append(self.preprocess(data_owner_index, Tensor(data_owner.increase_A.tolist())))
-                list_b.append(self.preprocess(data_owner_index, Tensor(data_owner.increase_b.tolist())))
+            with data_owner.timer.phase("encode"):
+                increase_A, increase_b = self.encode(data_owner.increase_A), self.encode(data_owner.increase_b)
+            with data_owner.timer.phase("preprocess"):
+                list_A.append(self.preprocess(data_owner_index, increase_A))
+                list_b.append(self.preprocess(data_owner_index, increase_b))
+            self.upload(data_owner_index, (list_A[-1], list_b[-1]))
 
         # call the server to reduce
-        with timer_server:
-            A, b = self.server(list_A, list_b)
+        A, b = self.aggregate(timer_server, list_A, list_b)
+        self.download((A, b), len(data_owners))
 
         # perform the post-processing stage
         for data_owner_index, data_owner in enumerate(data_owners):
-            with data_owner.timer:
-                data_owner.increase_A = numpy.array(self.postprocess(data_owner_index, A).data())
-                data_owner.increase_b = numpy.array(self.postprocess(data_owner_index, b).data())
+            with data_owner.timer.phase("postprocess"):
+                increase_A = self.postprocess(data_owner_index, self.delivered(data_owner_index, A))
+                increase_b = self.postprocess(data_owner_index, self.delivered(data_owner_index, b))
+            with data_owner.timer.phase("decode"):
+                data_owner.increase_A, data_owner.increase_b = self.decode(increase_A), self.decode(increase_b)
+
+    def encode(self, array: numpy.ndarray) -> Tensor:
+        """Returns the tensor given to the pre-processing stage from an increase of a data owner."""
+        return Tensor(array)
+
+    def decode(self, tensor: Tensor) -> numpy.ndarray:
+        """Returns the increase of a data owner from the tensor returned by the post-processing stage."""
+        return numpy.array(tensor.numpy(), dtype=float)
 
     @abstractclassmethod
     def preprocess(self, data_owner_index, tensor: Tensor) -> Tensor:
@@ -200,6 +590,7 @@ class CentralizedAdditionSecurityPolicy(SecurityPolicy):
 
     @abstractclassmethod
     def postprocess(self, data_owner_index, tensor: Tensor) -> Tensor:
+        """Returns the tensor given to the decoding from the part of the result delivered to a data owner."""
         pass
 
 class PlaintextSecurityPolicy(CentralizedAdditionSecurityPolicy):
@@ -220,8 +611,78 @@ class PlaintextSecurityPolicy(CentralizedAdditionSecurityPolicy):
     def postprocess(self, data_owner_index, tensor: Tensor) -> Tensor: return tensor
 
 
+class TreeAggregator:
+    """
+    Reduces tensors by a tree of intermediate aggregators, each of them combining at most fan_out tensors, such
+    that the aggregators of a same level work in parallel. The aggregators are simulated: they run one after the
+    other, the time of a level being the time of its slowest aggregator.
+    """
+
+    def __init__(self, fan_out) -> None:
+        assert fan_out >= 2, "The fan-out of the aggregation tree must be at least 2"
+        self.fan_out = fan_out
+        self.levels = {}
+
+    def critical_time(self) -> float:
+        return sum([level["critical-time"] for level in self.levels.values()])
+
+    def aggregate(self, timer_server: Timer, server, list_A, list_b):
+        """Runs the server reducing by the tree, only its critical time being accounted to the server timer."""
+        critical_time = self.critical_time()
+        A, b = server(list_A, list_b)
+        timer_server.add_time("aggregation", self.critical_time() - critical_time)
+        return A, b
+
+    def reduce(self, tensors: List[Tensor]) -> Tensor:
+        level = 0
+        while len(tensors) > 1:
+            level_key = f"level-{level}"
+            if level_key not in self.levels:
+                self.levels[level_key] = { "aggregators": 0, "time": 0.0, "critical-time": 0.0 }
+
+            # each aggregator of the level combines a subset of the tensors
+            reduced_tensors, aggregators_times = [], []
+            for start in range(0, len(tensors), self.fan_out):
+                timer = Timer()
+                with timer:
+                    reduced_tensors.append(reduce(lambda left, right: left + right, tensors[start:start + self.fan_out]))
+                aggregators_times.append(timer.time)
+
+            # since aggregators are parallel, the level lasts as long as its slowest aggregator
+            self.levels[level_key]["aggregators"] = len(aggregators_times)
+            self.levels[level_key]["time"] += sum(aggregators_times)
+            self.levels[level_key]["critical-time"] += max(aggregators_times)
+            tensors = reduced_tensors
+            level += 1
+        return tensors[0]
+
+    def statistics(self) -> dict:
+        return {
+            "fan-out": self.fan_out,
+            "levels": self.levels,
+            "critical-time": self.critical_time(),
+        }
+
+
+class TreeAggregationSecurityPolicy(PlaintextSecurityPolicy):
+    """Plaintext addition where the server reduces the tensors by a tree of aggregators."""
+
+    def __init__(self, fan_out) -> None:
+        super().__init__()
+        self.tree = TreeAggregator(fan_out)
+
+    def aggregate(self, timer_server: Timer, list_A, list_b):
+        return self.tree.aggregate(timer_server, self.server, list_A, list_b)
+
+    def server(self, list_A: List[Tensor], list_b: List[Tensor]) -> Tuple[Tensor, Tensor]:
+        return self.tree.reduce(list_A), self.tree.reduce(list_b)
+
+    def statistics(self) -> dict: return self.tree.statistics()
+
+
 class MaskedAdditionSecurityPolicy(CentralizedAdditionSecurityPolicy):
     def __init__(self, M) -> None:
+        super().__init__()
         # creates symmetric keys between each data owners and the server
         self.M = M
         self.ciphers = [
@@ -230,17 +691,19 @@ class MaskedAdditionSecurityPolicy(CentralizedAdditionSecurityPolicy):
         self.mask_generator = None
         self.masks = {}
         self.nonce = urandom(128)
+        # the increases are masked as residues of their fixed-point encoding
+        self.codec = FixedPointCodec(M)
 
     def init(self, timer_server: Timer, data_owners: List[DataOwnerContext]):
         # the first data owner creates a random seed that will be given to all other data owners
-        with data_owners[0].timer:
+        with data_owners[0].timer.phase("security-setup"):
             seed = randint(10, 1000)
             data_owners[0].mask_generator = SeedableRandomGenerator(seed)
             encrypted_seed = self.ciphers[0].encrypt(nonce=self.nonce, data=str(seed).encode(), associated_data=b"")
 
         cipher = self.ciphers[0]
         for data_owner in data_owners[1:]:
-            with data_owner.timer:
+            with data_owner.timer.phase("security-setup"):
                 decrypted_seed = cipher.decrypt(nonce=self.nonce, data=encrypted_seed, associated_data=b"")
                 decrypted_seed = int(decrypted_seed.decode())
                 assert decrypted_seed == seed, "The decrypted seed does not correspond to the given seed"
@@ -248,21 +711,31 @@ class MaskedAdditionSecurityPolicy(CentralizedAdditionSecurityPolicy):
 
     def time_step_begin(self, time_step, data_owner: DataOwnerContext):
         assert data_owner.mask_generator is not None, 'Time Step begins without a mask generator'
-        self.masks[data_owner.index] = data_owner.mask_generator.randint(t=time_step, min=10, max=10000)
+        self.masks[data_owner.index] = data_owner.mask_generator.randint(t=time_step, min=0, max=self.codec.modulus - 1)
+
+    def encode(self, array: numpy.ndarray) -> Tensor: return Tensor(self.codec.encode(array))
+
+    def decode(self, tensor: Tensor) -> numpy.ndarray: return self.codec.decode(tensor.numpy())
+
+    def mask(self, data_owner_index):
+        return self.codec.residue(self.masks[data_owner_index])
+
+    def unmask(self):
+        return self.codec.residue(sum(self.masks.values()))
 
     def preprocess(self, data_owner_index, tensor: Tensor) -> AES_GCM_CIPHERTEXT:
-        tensor = tensor.map(lambda item: item + self.masks[data_owner_index])
+        tensor = tensor.map(lambda residues: residues + self.mask(data_owner_index), vectorized=True)
         return aes_gcm_encrypt_tensor(cipher=self.ciphers[data_owner_index], tensor=tensor, nonce=self.nonce)
 
     def server(self, list_A: List[AES_GCM_CIPHERTEXT], list_b: List[AES_GCM_CIPHERTEXT]) -> Tuple[
         List[AES_GCM_CIPHERTEXT], List[AES_GCM_CIPHERTEXT]]:
         # decrypts the input
         list_A = [
-            aes_gcm_decrypt_tensor(cipher=self.ciphers[data_owner_index], ciphertext=ciphertext, nonce=self.nonce)
+            aes_gcm_decrypt_tensor(cipher=self.ciphers[data_owner_index], ciphertext=ciphertext, nonce=self.nonce, dtype=numpy.uint64)
             for data_owner_index, ciphertext in enumerate(list_A)
         ]
         list_b = [
-            aes_gcm_decrypt_tensor(cipher=self.ciphers[data_owner_index], ciphertext=ciphertext, nonce=self.nonce)
+            aes_gcm_decrypt_tensor(cipher=self.ciphers[data_owner_index], ciphertext=ciphertext, nonce=self.nonce, dtype=numpy.uint64)
             for data_owner_index, ciphertext in enumerate(list_b)
         ]
 
@@ -282,17 +755,154 @@ class MaskedAdditionSecurityPolicy(CentralizedAdditionSecurityPolicy):
 
         return list_A, list_b
 
-    def postprocess(self, data_owner_index, ciphertexts: List[AES_GCM_CIPHERTEXT]) -> AES_GCM_CIPHERTEXT:
+    def delivered(self, data_owner_index, ciphertexts: List[AES_GCM_CIPHERTEXT]) -> AES_GCM_CIPHERTEXT:
+        return ciphertexts[data_owner_index]
+
+    def postprocess(self, data_owner_index, ciphertext: AES_GCM_CIPHERTEXT) -> Tensor:
         tensor: Tensor = aes_gcm_decrypt_tensor(cipher=self.ciphers[data_owner_index],
-                                                ciphertext=ciphertexts[data_owner_index], nonce=self.nonce)
-        return tensor.map(lambda item: item - sum(self.masks.values()))
+                                                ciphertext=ciphertext, nonce=self.nonce, dtype=numpy.uint64)
+        return tensor.map(lambda residues: residues - self.unmask(), vectorized=True)
+
+    def statistics(self) -> dict: return self.traffic_statistics()
+
+
+class NumpyMaskedAdditionSecurityPolicy(MaskedAdditionSecurityPolicy):
+    """Masked addition where the increases stay numpy arrays, sent as encrypted binary frames."""
+
+    def encode(self, array: numpy.ndarray) -> numpy.ndarray: return self.codec.encode(array)
+
+    def decode(self, residues: numpy.ndarray) -> numpy.ndarray: return self.codec.decode(residues)
+
+    def preprocess(self, data_owner_index, residues: numpy.ndarray) -> AES_GCM_CIPHERTEXT:
+        return aes_gcm_encrypt_array(self.ciphers[data_owner_index], residues + self.mask(data_owner_index))
+
+    def server(self, list_A: List[AES_GCM_CIPHERTEXT], list_b: List[AES_GCM_CIPHERTEXT]) -> Tuple[
+        List[AES_GCM_CIPHERTEXT], List[AES_GCM_CIPHERTEXT]]:
+        # decrypts the input and do the addition
+        A = sum([
+            aes_gcm_decrypt_array(self.ciphers[data_owner_index], ciphertext)
+            for data_owner_index, ciphertext in enumerate(list_A)
+        ])
+        b = sum([
+            aes_gcm_decrypt_array(self.ciphers[data_owner_index], ciphertext)
+            for data_owner_index, ciphertext in enumerate(list_b)
+        ])
+
+        # encrypt the results
+        list_A = [aes_gcm_encrypt_array(cipher, A) for cipher in self.ciphers]
+        list_b = [aes_gcm_encrypt_array(cipher, b) for cipher in self.ciphers]
+        return list_A, list_b
+
+    def postprocess(self, data_owner_index, ciphertext: AES_GCM_CIPHERTEXT) -> numpy.ndarray:
+        residues = aes_gcm_decrypt_array(self.ciphers[data_owner_index], ciphertext)
+        return residues - self.unmask()
+
+
+class PairwiseMaskedAdditionSecurityPolicy(CentralizedAdditionSecurityPolicy):
+    """
+    Masked addition where the masks of the data owners cancel each other: each pair of data owners shares a key
+    agreed with X25519, whose AES keystream one adds and the other subtracts. The server sums the blinded residues
+    without any decryption and broadcasts the aggregate once.
+    """
+
+    broadcast = True
+
+    def __init__(self, M) -> None:
+        super().__init__()
+        self.M = M
+        self.codec = FixedPointCodec(M)
+        self.pair_generators = {}
+        self.time_steps = {}
+
+    def init(self, timer_server: Timer, data_owners: List[DataOwnerContext]):
+        # each data owner publishes a public key, relayed by the server to the other data owners
+        private_keys = []
+        for data_owner in data_owners:
+            with data_owner.timer.phase("security-setup"):
+                private_keys.append(X25519PrivateKey.generate())
+        with timer_server.phase("security-setup"):
+            public_keys = [private_key.public_key() for private_key in private_keys]
+
+        # each data owner derives the key shared with each other data owner
+        for data_owner_index, data_owner in enumerate(data_owners):
+            with data_owner.timer.phase("security-setup"):
+                for other_index, public_key in enumerate(public_keys):
+                    if other_index == data_owner_index: continue
+                    shared_key = private_keys[data_owner_index].exchange(public_key)
+                    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"pairwise-mask").derive(shared_key)
+                    self.pair_generators[(data_owner_index, other_index)] = KeystreamGenerator(key)
+
+    def time_step_begin(self, time_step, data_owner: DataOwnerContext):
+        self.time_steps[data_owner.index] = time_step
+
+    def mask(self, data_owner_index, shape) -> numpy.ndarray:
+        # A and b are drawn from distinct streams, told apart by their number of dimensions, the low 64 bits of the
+        # counter block indexing the blocks of a stream
+        time_step = self.time_steps[data_owner_index]
+        counter_block = (time_step << 64) | (len(shape) << 60)
+        count = int(numpy.prod(shape))
+        mask = numpy.zeros(count, dtype=numpy.uint64)
+        for other_index in range(self.M):
+            if other_index == data_owner_index: continue
+            bits = self.pair_generators[(data_owner_index, other_index)].bits(counter_block, count)
+            # the data owner of lower index adds the pairwise mask, the other one subtracts it
+            mask = mask + bits if data_owner_index < other_index else mask - bits
+        return mask.reshape(shape)
+
+    def encode(self, array: numpy.ndarray) -> numpy.ndarray: return self.codec.encode(array)
+
+    def decode(self, residues: numpy.ndarray) -> numpy.ndarray: return self.codec.decode(residues)
+
+    def preprocess(self, data_owner_index, residues: numpy.ndarray) -> numpy.ndarray:
+        return residues + self.mask(data_owner_index, residues.shape)
+
+    def server(self, list_A: List[numpy.ndarray], list_b: List[numpy.ndarray]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        A = sum(list_A)
+        b = sum(list_b)
+        return A, b
+
+    def postprocess(self, data_owner_index, residues: numpy.ndarray) -> numpy.ndarray: return residues
+
+    def statistics(self) -> dict: return self.traffic_statistics()
+
+
+class MaskedTreeAggregationSecurityPolicy(PairwiseMaskedAdditionSecurityPolicy):
+    """
+    Pairwise masked addition where the server reduces the blinded residues by a tree of aggregators, none of them
+    being able to unmask a partial sum.
+    """
+
+    def __init__(self, M, fan_out) -> None:
+        super().__init__(M)
+        self.tree = TreeAggregator(fan_out)
+
+    def aggregate(self, timer_server: Timer, list_A, list_b):
+        return self.tree.aggregate(timer_server, self.server, list_A, list_b)
+
+    def server(self, list_A: List[numpy.ndarray], list_b: List[numpy.ndarray]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        A = self.tree.reduce(list_A)
+        b = self.tree.reduce(list_b)
+        return A, b
+
+    def statistics(self) -> dict: return { **super().statistics(), **self.tree.statistics() }
 
 
 class SinglePaillierSecurityPolicy(CentralizedAdditionSecurityPolicy):
-    """All computations are performed using Paillier Cryptosystem."""
+    """All computations are performed using Paillier Cryptosystem, on the residues of the fixed-point encoding."""
 
-    def __init__(self) -> None:
-        self.pk, self.sk = PaillierKeyManager.load_or_create("single-paillier-key")
+    def __init__(self, M, key_length=DEFAULT_PAILLIER_KEY_LENGTH) -> None:
+        super().__init__()
+        self.codec = FixedPointCodec(M)
+        # the key setup is timed apart, since it is not part of the protocol
+        self.key_setup_timer = Timer()
+        with self.key_setup_timer:
+            self.pk, self.sk = PaillierKeyManager.load_or_create("single-paillier-key", n_length=key_length)
+
+    def encode(self, array: numpy.ndarray) -> Tensor:
+        # the residues are given as python integers, encrypted exactly by Paillier
+        return Tensor(self.codec.encode(array).astype(object))
+
+    def decode(self, tensor: Tensor) -> numpy.ndarray: return self.codec.decode(tensor.numpy())
 
     def preprocess(self, data_owner_index, tensor: Tensor) -> Tensor: return paillier_encrypt_tensor(self.pk, tensor)
 
@@ -303,6 +913,86 @@ class SinglePaillierSecurityPolicy(CentralizedAdditionSecurityPolicy):
 
     def postprocess(self, data_owner_index, tensor: Tensor) -> Tensor: return paillier_decrypt_tensor(self.sk, tensor)
 
+    def statistics(self) -> dict:
+        return {
+            "key-length": self.pk.n.bit_length(),
+            "key-setup-time": self.key_setup_timer.time,
+        }
+
+
+class PackedCiphertexts:
+    """Paillier ciphertexts of a tensor whose entries are packed in the slots of the plaintexts."""
+
+    def __init__(self, shape, ciphertexts: List[EncryptedNumber]) -> None:
+        self.shape = shape
+        self.ciphertexts = ciphertexts
+
+    def __add__(self, other):
+        return PackedCiphertexts(self.shape, [left + right for left, right in zip(self.ciphertexts, other.ciphertexts)])
+
+
+class PackedPaillierSecurityPolicy(CentralizedAdditionSecurityPolicy):
+    """
+    Computations are performed using Paillier Cryptosystem, where many fixed-point entries are packed in the
+    slots of a single plaintext. Each slot keeps enough headroom bits to hold the carries of the sum of the
+    residues of the M data owners.
+    """
+
+    def __init__(self, M, precision_bits=32, value_bits=64, key_length=DEFAULT_PAILLIER_KEY_LENGTH) -> None:
+        super().__init__()
+        self.key_setup_timer = Timer()
+        with self.key_setup_timer:
+            self.pk, self.sk = PaillierKeyManager.load_or_create("single-paillier-key", n_length=key_length)
+        self.M = M
+        self.codec = FixedPointCodec(M, precision_bits=precision_bits, value_bits=value_bits)
+        self.slot_bits = value_bits + self.codec.headroom_bits
+        self.slots = (self.pk.n.bit_length() - 1) // self.slot_bits
+        assert self.slots >= 1, "The Paillier key is too short to pack a single slot"
+        self.nb_encryptions = 0
+        self.nb_additions = 0
+
+    def encode(self, array: numpy.ndarray) -> numpy.ndarray: return array
+
+    def decode(self, array: numpy.ndarray) -> numpy.ndarray: return array
+
+    def preprocess(self, data_owner_index, array: numpy.ndarray) -> PackedCiphertexts:
+        entries = [int(entry) for entry in self.codec.encode(array).ravel()]
+        ciphertexts = []
+        for start in range(0, len(entries), self.slots):
+            plaintext = 0
+            for slot, entry in enumerate(entries[start:start + self.slots]):
+                plaintext |= entry << (slot * self.slot_bits)
+            ciphertexts.append(EncryptedNumber(self.pk, self.pk.raw_encrypt(plaintext), exponent=0))
+        self.nb_encryptions += len(ciphertexts)
+        return PackedCiphertexts(array.shape, ciphertexts)
+
+    def server(self, list_A: List[PackedCiphertexts], list_b: List[PackedCiphertexts]) -> Tuple[PackedCiphertexts, PackedCiphertexts]:
+        self.nb_additions += (len(list_A) - 1) * (len(list_A[0].ciphertexts) + len(list_b[0].ciphertexts))
+        A = reduce(lambda A_i, A_j: A_i + A_j, list_A)
+        b = reduce(lambda b_i, b_j: b_i + b_j, list_b)
+        return A, b
+
+    def postprocess(self, data_owner_index, packed_ciphertexts: PackedCiphertexts) -> numpy.ndarray:
+        slot_mask = (1 << self.slot_bits) - 1
+        nb_entries = int(numpy.prod(packed_ciphertexts.shape))
+        entries = []
+        for ciphertext in packed_ciphertexts.ciphertexts:
+            plaintext = self.sk.raw_decrypt(ciphertext.ciphertext(be_secure=False))
+            for slot in range(min(self.slots, nb_entries - len(entries))):
+                # each slot contains the sum of the residues of the M data owners, reduced by the codec
+                entries.append(plaintext >> (slot * self.slot_bits) & slot_mask)
+        return self.codec.decode(numpy.array(entries, dtype=object)).reshape(packed_ciphertexts.shape)
+
+    def statistics(self) -> dict:
+        return {
+            "packing-factor": self.slots,
+            "slot-bits": self.slot_bits,
+            "encryptions": self.nb_encryptions,
+            "homomorphic-additions": self.nb_additions,
+            "key-length": self.pk.n.bit_length(),
+            "key-setup-time": self.key_setup_timer.time,
+        }
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 # Synchronization Policy
@@ -310,35 +1000,175 @@ class SinglePaillierSecurityPolicy(CentralizedAdditionSecurityPolicy):
 class SynchronizationPolicy:
     """Notifies when a algorithm_sync is required."""
 
+    # whether the decision depends on the local variables of the data owners, not only on the time step
+    requires_data_owners = False
+
     @abstractclassmethod
-    def requiredSynchronize(self, time_step): pass
+    def requiredSynchronize(self, time_step, data_owners=None): pass
 
 class EachStepSynchronization(SynchronizationPolicy):
     """A algorithm_sync is done every two steps."""
 
-    def requiredSynchronize(self, time_step): return True
+    def requiredSynchronize(self, time_step, data_owners=None): return True
 
 class TwoStepSynchronization(SynchronizationPolicy):
     """A algorithm_sync is done every two steps."""
 
-    def requiredSynchronize(self, time_step): return time_step % 2 == 0
+    def requiredSynchronize(self, time_step, data_owners=None): return time_step % 2 == 0
 
 class FourStepSynchronization(SynchronizationPolicy):
     """A algorithm_sync is done every two steps."""
 
-    def requiredSynchronize(self, time_step): return time_step % 4 == 0
+    def requiredSynchronize(self, time_step, data_owners=None): return time_step % 4 == 0
 
 class RegularStepSynchronization(SynchronizationPolicy):
     """A algorithm_sync is done every two steps."""
 
     def __init__(self,n): self.n = n
-    def requiredSynchronize(self, time_step): return time_step % self.n == 0
+    def requiredSynchronize(self, time_step, data_owners=None): return time_step % self.n == 0
 
 
 class NoSynchronization(SynchronizationPolicy):
     """No algorithm_sync."""
 
-    def requiredSynchronize(self, time_step): return False
+    def requiredSynchronize(self, time_step, data_owners=None): return False
+
+
+class AdaptiveSynchronization(SynchronizationPolicy):
+    """
+    A algorithm_sync is done as soon as the local statistics of a data owner changed enough: when the determinant
+    of its A + increase_A (regularized by gamma) exceeds threshold times the determinant of its A at the last sync.
+    """
+
+    requires_data_owners = True
+
+    def __init__(self, threshold, gamma):
+        self.log_threshold = log(threshold)
+        self.gamma = gamma
+        self.references = None
+
+    def log_determinant(self, matrix):
+        _, log_determinant = numpy.linalg.slogdet(matrix + self.gamma * numpy.identity(matrix.shape[-1]))
+        return log_determinant
+
+    def requiredSynchronize(self, time_step, data_owners=None):
+        assert data_owners is not None, "The adaptive synchronization requires the data owners"
+        # the references are taken at the first turn following a algorithm_sync, once A has been updated
+        if self.references is None:
+            self.references = [self.log_determinant(data_owner.A) for data_owner in data_owners]
+
+        for data_owner, reference in zip(data_owners, self.references):
+            if self.log_determinant(data_owner.A + data_owner.increase_A) - reference > self.log_threshold:
+                self.references = None
+                return True
+        return False
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Arm Scoring
+# ----------------------------------------------------------------------------------------------------------------------
+def loop_arm_scores(x, O, inv, exploration_term):
+    """Returns the UCB score of each arm, computed one arm after the other."""
+    list_B = []
+    for i in range(len(x)):
+        list_B.append( x[i].dot(O) + exploration_term * sqrt(x[i].dot(inv).dot(x[i])) )
+    return list_B
+
+def vectorized_arm_scores(x, O, inv, exploration_term):
+    """Returns the UCB score of each arm, computed for all the K arms at once."""
+    exploitation = x.dot(O)
+    exploration = numpy.sqrt((x.dot(inv) * x).sum(axis=1))
+    return exploitation + exploration_term * exploration
+
+def arm_scoring_function(arm_scoring):
+    """Returns the function used to score the arms of a data owner."""
+    arm_scoring_selector: Switch = Switch()
+    arm_scoring_selector.case(ARM_SCORING_LOOP, lambda: loop_arm_scores)
+    arm_scoring_selector.case(ARM_SCORING_VECTORIZED, lambda: vectorized_arm_scores)
+    return arm_scoring_selector.run(arm_scoring)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Incremental Inverse
+# ----------------------------------------------------------------------------------------------------------------------
+def sherman_morrison_update(inv, u):
+    """Returns the inverse of (M + u u^T) given the inverse of a symmetric matrix M."""
+    v = inv.dot(u)
+    return inv - numpy.outer(v, v) / (1 + u.dot(v))
+
+def woodbury_update(inv, U):
+    """Returns the inverse of (M + U^T U) given the inverse of a symmetric matrix M and a r x d factor U."""
+    if len(U) == 0: return inv
+    if len(U) == 1: return sherman_morrison_update(inv, U[0])
+    V = U.dot(inv)
+    S = numpy.identity(len(U)) + V.dot(U.T)
+    return inv - V.T.dot(numpy.linalg.solve(S, V))
+
+def low_rank_factor(matrix, max_rank, tolerance=1e-10):
+    """
+    Returns a r x d factor U such that matrix = U^T U using a pivoted Cholesky decomposition of the
+    positive semi-definite matrix, or None when the rank of the matrix exceeds max_rank.
+    """
+    residual_diagonal = numpy.diag(matrix).astype(float)
+    threshold = tolerance * max(residual_diagonal.max(), 0)
+    U = numpy.zeros((max_rank, len(matrix)))
+    for rank in range(max_rank + 1):
+        pivot = argmax(residual_diagonal)
+        if residual_diagonal[pivot] <= threshold:
+            return U[:rank]
+        if rank == max_rank:
+            return None
+        U[rank] = (matrix[pivot] - U[:rank, pivot].dot(U[:rank])) / sqrt(residual_diagonal[pivot])
+        residual_diagonal -= U[rank] ** 2
+
+
+class IncrementalInverse:
+    """
+    Maintains the inverse of (A + gamma I) across low-rank updates of A, with a periodic full re-inversion
+    bounding the numerical drift.
+    """
+
+    def __init__(self, A, gamma, reinversion_period):
+        self.gamma = gamma
+        self.reinversion_period = reinversion_period
+        # beyond about half the dimension, a Woodbury update costs more than the inversion itself
+        self.max_rank = max(1, len(A) // 2)
+        self.turns_since_inversion = 0
+        self.nb_low_rank_updates = 0
+        self.nb_reinversions = 0
+        self.drifts = []
+        self.nb_fallback_reinversions = 0
+        self.fallback_drifts = []
+        self.reinvert(A)
+
+    def reinvert(self, A):
+        self.matrix = A + self.gamma * numpy.identity(len(A))
+        self.inv = numpy.linalg.inv(self.matrix)
+        self.turns_since_inversion = 0
+
+    def update(self, A, U):
+        """
+        Updates the inverse once U^T U has been added to A, where A is the already updated matrix. U is None when the
+        update is known to exceed max_rank and has not been factorized.
+        """
+        self.turns_since_inversion += 1
+        if U is None or len(U) > self.max_rank:
+            # the drift is the residual of the incremental inverse on the matrix it stood for
+            if self.turns_since_inversion > 1:
+                residual = self.inv.dot(self.matrix) - numpy.identity(len(A))
+                self.fallback_drifts.append(float(numpy.abs(residual).max()))
+            self.reinvert(A)
+            self.nb_fallback_reinversions += 1
+        elif self.turns_since_inversion >= self.reinversion_period:
+            # the drift is the relative gap between the incremental and the exact inverse
+            inv = woodbury_update(self.inv, U)
+            self.reinvert(A)
+            self.nb_reinversions += 1
+            self.drifts.append(float(numpy.abs(inv - self.inv).max() / numpy.abs(self.inv).max()))
+        else:
+            self.inv = woodbury_update(self.inv, U)
+            self.matrix = A + self.gamma * numpy.identity(len(A))
+            self.nb_low_rank_updates += 1
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -353,16 +1183,17 @@ def linucb_naive(
 ) -> Recording:
     """Launch the first version of LinUCB"""
 
-    # the pull function need to be parameterized with some seed which is increased at each call
-    seed_container = [execution_config.seed]
+    # the UCB score of each arm is computed either arm by arm or for all arms at once
+    arm_scores = arm_scoring_function(execution_config.arm_scoring)
+
+    # the inverse of (A + gamma I) is either computed at each turn or maintained across the updates of A
+    incremental_inverse = execution_config.inverse_update == INVERSE_INCREMENTAL
 
-    def pull(i):
-        seed = seed_container[0]
-        setseed(seed)
-        seed_container[0] += 1
-        numpy.random.seed(seed)
-        noise = uniform(-data.R, data.R)
-        return dot(x[i], data.theta) + noise
+    # the noise of each pull only depends on the seed, the data owner and the turn
+    noise = RewardNoise(seed=execution_config.seed, R=data.R, N=data.N, M=data.M)
+
+    def pull(x_i, data_owner_index, t):
+        return dot(x_i, data.theta) + noise.value(data_owner_index, t)
 
     # ------------------------------------------------------------------------
     # DataOwner(s)
@@ -385,51 +1216,48 @@ def linucb_naive(
     )
 
     # variables used to track the evolution of the algorithm
-    _data_by_turn = RecursiveMap( root = {} )
-    EXECUTION_TIME_KEY = "execution-time"
-    REWARDS = "rewards"
-    THETA_MSE = "theta-mse"
-    DETAILS = "details"
-    SUM = "sum"
+    _data_by_turn = new_turn_recorder(execution_config, data.N, data.M)
 
     def register_data_for_turn( t ):
-        # recording turn-by-turn information
-        data_owners_sum_exec_time = sum([data_owner.timer.time for data_owner in data_owners])
-        _data_by_turn[[t, REWARDS, DETAILS]] = []
-        _data_by_turn[[t, REWARDS, SUM]] = sum([ data_owner.s for data_owner in data_owners ])
-        _data_by_turn[[t, THETA_MSE, DETAILS]] = []
-        _data_by_turn[[t, EXECUTION_TIME_KEY, "data-owners", DETAILS]] = []
-        _data_by_turn[[t, EXECUTION_TIME_KEY, "data-owners", SUM]] = data_owners_sum_exec_time
-        for data_owner_index, data_owner in enumerate(data_owners):
-            mse_theta = ((data.theta - data_owner.O) ** 2).mean()
-            _data_by_turn[[t, THETA_MSE, DETAILS]].append(mse_theta)
-            _data_by_turn[[t, REWARDS, DETAILS]].append(data_owner.s)
-            _data_by_turn[[t, EXECUTION_TIME_KEY, "data-owners", DETAILS]].append(data_owner.timer.time)
-            _data_by_turn[[t, EXECUTION_TIME_KEY, "server"]] = timer_server.time
-            _data_by_turn[[t, EXECUTION_TIME_KEY, "sum"]] = timer_server.time + data_owners_sum_exec_time
-        _data_by_turn[[t, THETA_MSE, SUM]] = sum(_data_by_turn[[t, THETA_MSE, DETAILS]])
+        # recording turn-by-turn information, at the turns of the recording schedule
+        if not _data_by_turn.records(t): return
+        _data_by_turn.record(
+            t,
+            rewards=[data_owner.s for data_owner in data_owners],
+            theta_mse=[((data.theta - data_owner.O) ** 2).mean() for data_owner in data_owners],
+            data_owners_times=[data_owner.timer.time for data_owner in data_owners],
+            server_time=timer_server.time
+        )
+        register_communication_for_turn(_data_by_turn, t, security_policy.traffic, data.M)
+        register_phases_for_turn(_data_by_turn, t, timer_server, [data_owner.timer for data_owner in data_owners])
 
     global_start = time()
 
 
     # Initialization: each data owner Pull an arm and initialize variables
     for data_owner_index, (data_owner, x) in enumerate(zip(data_owners, data.X)):
-        with data_owner.timer:
+        with data_owner.timer.phase("initialization"):
             data_owner.index = data_owner_index
             data_owner.x = numpy.asarray(x)
             data_owner.L = max([numpy.linalg.norm(data_owner.x[i]) for i in range(data.K)])
             i = 0
-            r = pull(i)
+            r = pull(data_owner.x[i], data_owner_index, t=1)
             data_owner.s = r
             data_owner.A = numpy.outer(data_owner.x[i], data_owner.x[i])
             data_owner.b = r * data_owner.x[i]
             data_owner.increase_A = 0
             data_owner.increase_b = 0
-            inv = numpy.linalg.inv(data_owner.A + data.gamma * numpy.identity(data.d))
+            data_owner.pulls_since_sync = {}
+            if incremental_inverse:
+                data_owner.inverse = IncrementalInverse(data_owner.A, data.gamma, execution_config.reinversion_period)
+                inv = data_owner.inverse.inv
+            else:
+                inv = numpy.linalg.inv(data_owner.A + data.gamma * numpy.identity(data.d))
             data_owner.O = inv.dot(data_owner.b)
 
     # register since an arm has been pulled
     register_data_for_turn(t=1)
+    nb_synchronizations = 0
 
     # Exploration - Exploitation: Maximize the cumulative reward
     for t in range(2, data.N):
@@ -443,31 +1271,38 @@ def linucb_naive(
             delta = data.delta
             R = data.R
             L = data_owner.L
-            K = data.K
 
-            with data_owner.timer:
+            timer = data_owner.timer
+            with timer.phase("mask-setup"):
                 security_policy.time_step_begin(t, data_owner)
 
-                inv = numpy.linalg.inv(A + gamma * numpy.identity(d))
-                data_owner.O = inv.dot(b)
+            with timer.phase("local-phase"):
+                with timer.phase("inversion"):
+                    if incremental_inverse:
+                        inv = data_owner.inverse.inv
+                    else:
+                        inv = numpy.linalg.inv(A + gamma * numpy.identity(d))
+                    data_owner.O = inv.dot(b)
                 exploration_term = R * sqrt(d * log((1 + (t * L)/gamma)/delta)) + sqrt(gamma) * log(t)
 
                 # list of Bi
-                list_B = []
-                for i in range(K):
-                    list_B.append( x[i].dot(data_owner.O) + exploration_term * sqrt(x[i].dot(inv).dot(x[i])) )
+                with timer.phase("arm-scoring"):
+                    list_B = arm_scores(x, data_owner.O, inv, exploration_term)
 
                 # Choose one arm among all equal maximums using the random permutation
-                max_B = argmax(list_B)
-                x_i = x[max_B]
-                r = pull(max_B)
-                data_owner.s += r
-                data_owner.increase_A += numpy.outer(x_i, x_i)
-                data_owner.increase_b += r * x_i
+                with timer.phase("pull"):
+                    max_B = argmax(list_B)
+                    x_i = x[max_B]
+                    r = pull(x_i, data_owner_index, t)
+                    data_owner.s += r
+                    data_owner.increase_A += numpy.outer(x_i, x_i)
+                    data_owner.increase_b += r * x_i
+                    data_owner.pulls_since_sync[max_B] = data_owner.pulls_since_sync.get(max_B, 0) + 1
 
         # perform the algorithm_sync if required
-        synchronization_required = synchronization_policy.requiredSynchronize( t )
+        synchronization_required = synchronization_policy.requiredSynchronize( t, data_owners )
         if synchronization_required:
+            nb_synchronizations += 1
             security_policy.synchronize(
                 timer_server=timer_server,
                 data_owners=data_owners
@@ -475,21 +1310,74 @@ def linucb_naive(
 
         # Update local variables of each data owner from the synchronization
         for data_owner_index, data_owner in enumerate(data_owners):
-            with data_owner.timer:
+            with data_owner.timer.phase("update"):
                 data_owner.s += r
                 data_owner.A += data_owner.increase_A
                 data_owner.b += data_owner.increase_b
+                if incremental_inverse:
+                    # A grows by the whole increase since the last sync, hence U factorizes that increase
+                    max_rank = data_owner.inverse.max_rank
+                    if synchronization_required:
+                        # the aggregated increase is only known as a matrix, of rank at most M per pull since the sync
+                        rank_bound = data.M * sum(data_owner.pulls_since_sync.values())
+                        U = low_rank_factor(data_owner.increase_A, min(rank_bound, max_rank))
+                    elif len(data_owner.pulls_since_sync) <= max_rank:
+                        # the local increase is the sum of the outer products of the arms pulled since the last sync
+                        U = numpy.array([
+                            sqrt(count) * data_owner.x[arm]
+                            for arm, count in data_owner.pulls_since_sync.items()
+                        ])
+                    else:
+                        U = None
+                    data_owner.inverse.update(data_owner.A, U)
                 if synchronization_required:
                     data_owner.increase_A = 0
                     data_owner.increase_b = 0
+                    data_owner.pulls_since_sync = {}
 
         # recording turn-by-turn information
         register_data_for_turn(t=t)
 
     # perform the recording
     global_end = time()
-    rewards = sum(map(lambda context: context.s, data_owners))
     global_execution_time = global_end - global_start
+    rewards = record_linucb_execution(
+        recording=recording,
+        execution_config=execution_config,
+        global_execution_time=global_execution_time,
+        data_by_turn=_data_by_turn,
+        timer_server=timer_server,
+        data_owners=data_owners,
+        security_policy=security_policy,
+        nb_synchronizations=nb_synchronizations
+    )
+
+    if incremental_inverse:
+        inverses = [data_owner.inverse for data_owner in data_owners]
+        drifts = [drift for inverse in inverses for drift in inverse.drifts]
+        fallback_drifts = [drift for inverse in inverses for drift in inverse.fallback_drifts]
+        recording.add_inverse_recording(
+            algorithm=LINUCB_ALGORITHM,
+            algorithm_version=execution_config.algorithm_version,
+            iteration=execution_config.iteration,
+            nb_low_rank_updates=sum([inverse.nb_low_rank_updates for inverse in inverses]),
+            nb_reinversions=sum([inverse.nb_reinversions for inverse in inverses]),
+            max_drift=max(drifts) if drifts else 0.0,
+            nb_fallback_reinversions=sum([inverse.nb_fallback_reinversions for inverse in inverses]),
+            max_fallback_drift=max(fallback_drifts) if fallback_drifts else 0.0
+        )
+
+    return rewards
+
+
+def record_linucb_execution(recording: Recording, execution_config: ExecutionConfiguration, global_execution_time,
+                            data_by_turn: TurnRecorder, timer_server, data_owners, security_policy: SecurityPolicy,
+                            nb_synchronizations) -> float:
+    """
+    Puts the execution, turn-by-turn, synchronization, entities and security recordings of a LinUCB run and
+    returns the rewards.
+    """
+    rewards = sum(map(lambda context: context.s, data_owners))
     iteration = execution_config.iteration
     recording.add_execution_recording(
         algorithm=LINUCB_ALGORITHM,
@@ -504,15 +1392,32 @@ def linucb_naive(
         algorithm=LINUCB_ALGORITHM,
         algorithm_version=execution_config.algorithm_version,
         iteration=iteration,
-        turn_by_turn_data=_data_by_turn
+        turn_by_turn_data=data_by_turn
+    )
+
+    recording.add_synchronization_recording(
+        algorithm=LINUCB_ALGORITHM,
+        algorithm_version=execution_config.algorithm_version,
+        iteration=iteration,
+        nb_synchronizations=nb_synchronizations
+    )
+
+    recording.add_security_recording(
+        algorithm=LINUCB_ALGORITHM,
+        algorithm_version=execution_config.algorithm_version,
+        iteration=iteration,
+        statistics=security_policy.statistics()
     )
 
     recording.add_entity_recording(
         algorithm=LINUCB_ALGORITHM,
         algorithm_version=execution_config.algorithm_version,
         iteration=iteration,
-        entity="server",
-        execution_time=timer_server.time
+        entity=SERVER_ENTITY,
+        execution_time=timer_server.time,
+        sent_bytes=security_policy.traffic.sent_bytes(SERVER_ENTITY),
+        received_bytes=security_policy.traffic.received_bytes(SERVER_ENTITY),
+        phases=timer_server.phases
     )
 
     for data_owner_index, data_owner in enumerate(data_owners):
@@ -520,10 +1425,847 @@ def linucb_naive(
             algorithm=LINUCB_ALGORITHM,
             algorithm_version=execution_config.algorithm_version,
             iteration=iteration,
-            entity=f"data-owner-{data_owner_index}",
+            entity=data_owner_entity(data_owner_index),
             execution_time=data_owner.timer.time,
-            reward=data_owner.s
+            reward=data_owner.s,
+            sent_bytes=security_policy.traffic.sent_bytes(data_owner_entity(data_owner_index)),
+            received_bytes=security_policy.traffic.received_bytes(data_owner_entity(data_owner_index)),
+            phases={path: float(elapsed) for path, elapsed in data_owner.timer.phases.items()}
+        )
+
+    return rewards
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Batched LINU-UCB Algorithm
+# ----------------------------------------------------------------------------------------------------------------------
+class StackedTimers:
+    """Execution times of all the data owners, and of their phases, stored in arrays."""
+
+    def __init__(self, M) -> None:
+        self.times = numpy.zeros(M)
+        self.start = None
+        self.phase_times = {}
+        self.current_phases = []
+
+    def __enter__(self, *args):
+        self.start = perf_counter()
+
+    def __exit__(self, *args):
+        # a batched stage is performed for all data owners at once, hence its time is shared between them
+        self.times += (perf_counter() - self.start) / len(self.times)
+        self.start = None
+
+    def running(self) -> bool: return self.start is not None
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def add_phase_time(self, path, elapsed):
+        self.phase_times[path] = self.phase_times.get(path, numpy.zeros(len(self.times))) + elapsed / len(self.times)
+
+    def timer(self, index):
+        return StackedTimer(self, index)
+
+
+class StackedTimer:
+    """Timer of a single data owner whose time is stored in the stacked timers."""
+
+    def __init__(self, timers: StackedTimers, index) -> None:
+        self.timers = timers
+        self.index = index
+        self.start = None
+
+    @property
+    def time(self):
+        return self.timers.times[self.index]
+
+    @property
+    def phases(self) -> dict:
+        return {path: times[self.index] for path, times in self.timers.phase_times.items()}
+
+    @property
+    def current_phases(self): return self.timers.current_phases
+
+    def __enter__(self, *args):
+        self.start = perf_counter()
+
+    def __exit__(self, *args):
+        self.timers.times[self.index] += perf_counter() - self.start
+        self.start = None
+
+    def running(self) -> bool: return self.start is not None
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def add_phase_time(self, path, elapsed):
+        self.timers.phase_times.setdefault(path, numpy.zeros(len(self.timers.times)))[self.index] += elapsed
+
+
+class BatchedState:
+    """State of all the data owners, stored as stacked arrays indexed by the data owner."""
+
+    def __init__(self, data: DataWrapper) -> None:
+        M, K, d = data.M, data.K, data.d
+        self.x = numpy.asarray(data.X, dtype=float).reshape((M, K, d))
+        self.L = numpy.linalg.norm(self.x, axis=2).max(axis=1)
+        self.A = numpy.zeros((M, d, d))
+        self.b = numpy.zeros((M, d))
+        self.O = numpy.zeros((M, d))
+        self.s = numpy.zeros(M)
+        self.increase_A = numpy.zeros((M, d, d))
+        self.increase_b = numpy.zeros((M, d))
+        self.timers = StackedTimers(M)
+
+
+class BatchedDataOwnerContext(DataOwnerContext):
+    """
+    View on a single data owner of the batched state, such that the security and synchronization policies
+    can work on the batched state as they do on the naive one.
+    """
+
+    def __init__(self, state: BatchedState, index) -> None:
+        self.state = state
+        self.index = index
+        self.timer = state.timers.timer(index)
+
+    @property
+    def x(self): return self.state.x[self.index]
+
+    @property
+    def A(self): return self.state.A[self.index]
+
+    @property
+    def b(self): return self.state.b[self.index]
+
+    @property
+    def O(self): return self.state.O[self.index]
+
+    @property
+    def s(self): return self.state.s[self.index]
+
+    @property
+    def increase_A(self): return self.state.increase_A[self.index]
+
+    @increase_A.setter
+    def increase_A(self, value): self.state.increase_A[self.index] = value
+
+    @property
+    def increase_b(self): return self.state.increase_b[self.index]
+
+    @increase_b.setter
+    def increase_b(self, value): self.state.increase_b[self.index] = value
+
+
+def linucb_batched(
+        data: DataWrapper,
+        recording: Recording,
+        execution_config: ExecutionConfiguration,
+        security_policy: SecurityPolicy,
+        synchronization_policy: SynchronizationPolicy
+) -> Recording:
+    """Launch LinUCB where every stage is performed for all the data owners at once."""
+    if execution_config.arm_scoring != ARM_SCORING_VECTORIZED or execution_config.inverse_update == INVERSE_INCREMENTAL:
+        raise Exception("The batched engine only supports the vectorized arm scoring with the direct inverse")
+
+    M, d = data.M, data.d
+    gamma, delta, R = data.gamma, data.delta, data.R
+    theta = numpy.asarray(data.theta)
+    owners = numpy.arange(M)
+    identity = numpy.identity(d)
+
+    # the noise of each pull only depends on the seed, the data owner and the turn
+    noise = RewardNoise(seed=execution_config.seed, R=R, N=data.N, M=M)
+
+    def pull(x_i, t):
+        return x_i.dot(theta) + noise.turn(t)
+
+    # ------------------------------------------------------------------------
+    # DataOwner(s)
+    # ------------------------------------------------------------------------
+    # Every variable of the data owners is stored in a stacked array, while the policies are given a view
+    # on each data owner.
+    state = BatchedState(data)
+    data_owners = [BatchedDataOwnerContext(state, data_owner_index) for data_owner_index in range(M)]
+    timers = state.timers
+    timer_server = Timer()
+
+    # initialize the security policy (e.g,. initial secure communication for the rest of the protocol)
+    security_policy.init(
+        timer_server=timer_server,
+        data_owners=data_owners
+    )
+
+    # variables used to track the evolution of the algorithm
+    _data_by_turn = new_turn_recorder(execution_config, data.N, data.M)
+
+    def register_data_for_turn( t ):
+        # recording turn-by-turn information, at the turns of the recording schedule
+        if not _data_by_turn.records(t): return
+        _data_by_turn.record(
+            t,
+            rewards=state.s,
+            theta_mse=((theta - state.O) ** 2).mean(axis=1),
+            data_owners_times=timers.times,
+            server_time=timer_server.time
+        )
+        register_communication_for_turn(_data_by_turn, t, security_policy.traffic, data.M)
+        register_phases_for_turn(_data_by_turn, t, timer_server, [data_owner.timer for data_owner in data_owners])
+
+    global_start = time()
+
+    # Initialization: each data owner Pull the first arm and initialize variables
+    with timers.phase("initialization"):
+        x_i = state.x[:, 0]
+        r = pull(x_i, t=1)
+        state.s[:] = r
+        state.A[:] = numpy.einsum("mi,mj->mij", x_i, x_i)
+        state.b[:] = r[:, None] * x_i
+        inv = numpy.linalg.inv(state.A + gamma * identity)
+        state.O[:] = numpy.einsum("mij,mj->mi", inv, state.b)
+
+    # register since an arm has been pulled
+    register_data_for_turn(t=1)
+    nb_synchronizations = 0
+
+    # Exploration - Exploitation: Maximize the cumulative reward
+    for t in range(2, data.N):
+        for data_owner in data_owners:
+            with data_owner.timer.phase("mask-setup"):
+                security_policy.time_step_begin(t, data_owner)
+
+        # The first stage is to select an arm for all data owners at once
+        with timers.phase("local-phase"):
+            with timers.phase("inversion"):
+                inv = numpy.linalg.inv(state.A + gamma * identity)
+                state.O[:] = numpy.einsum("mij,mj->mi", inv, state.b)
+            with timers.phase("arm-scoring"):
+                exploration_term = R * numpy.sqrt(d * numpy.log((1 + (t * state.L) / gamma) / delta)) + sqrt(gamma) * log(t)
+                exploitation = numpy.einsum("mkd,md->mk", state.x, state.O)
+                exploration = numpy.sqrt((numpy.matmul(state.x, inv) * state.x).sum(axis=2))
+                list_B = exploitation + exploration_term[:, None] * exploration
+
+            with timers.phase("pull"):
+                max_B = argmax(list_B, axis=1)
+                x_i = state.x[owners, max_B]
+                r = pull(x_i, t)
+                state.s += r
+                state.increase_A += numpy.einsum("mi,mj->mij", x_i, x_i)
+                state.increase_b += r[:, None] * x_i
+
+        # perform the algorithm_sync if required
+        synchronization_required = synchronization_policy.requiredSynchronize( t, data_owners )
+        if synchronization_required:
+            nb_synchronizations += 1
+            security_policy.synchronize(
+                timer_server=timer_server,
+                data_owners=data_owners
+            )
+
+        # Update local variables of each data owner from the synchronization
+        with timers.phase("update"):
+            # as in the naive version, each data owner adds the last reward pulled during the turn
+            state.s += r[-1]
+            state.A += state.increase_A
+            state.b += state.increase_b
+            if synchronization_required:
+                state.increase_A[:] = 0
+                state.increase_b[:] = 0
+
+        # recording turn-by-turn information
+        register_data_for_turn(t=t)
+
+    # perform the recording
+    global_end = time()
+    return record_linucb_execution(
+        recording=recording,
+        execution_config=execution_config,
+        global_execution_time=global_end - global_start,
+        data_by_turn=_data_by_turn,
+        timer_server=timer_server,
+        data_owners=data_owners,
+        security_policy=security_policy,
+        nb_synchronizations=nb_synchronizations
+    )
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Multi-Process LINU-UCB Algorithm
+# ----------------------------------------------------------------------------------------------------------------------
+class LocalDataOwner:
+    """Variables and local phase of a single data owner, executed apart from the other data owners."""
+
+    def __init__(self, index, x, parameters: dict, noise: RewardNoise, arm_scores) -> None:
+        self.index = index
+        self.x = x
+        self.parameters = parameters
+        self.noise = noise
+        self.arm_scores = arm_scores
+        self.timer = Timer()
+
+        with self.timer.phase("initialization"):
+            d, gamma = parameters["d"], parameters["gamma"]
+            self.L = numpy.linalg.norm(x, axis=1).max()
+            x_i = x[0]
+            r = self.pull(x_i, t=1)
+            self.s = r
+            self.A = numpy.outer(x_i, x_i)
+            self.b = r * x_i
+            self.increase_A = numpy.zeros((d, d))
+            self.increase_b = numpy.zeros(d)
+            inv = numpy.linalg.inv(self.A + gamma * numpy.identity(d))
+            self.O = inv.dot(self.b)
+
+    def pull(self, x_i, t):
+        return dot(x_i, self.parameters["theta"]) + self.noise.value(self.index, t)
+
+    def local_phase(self, t):
+        """Selects and pulls an arm, then returns the obtained reward."""
+        d, gamma, delta, R = self.parameters["d"], self.parameters["gamma"], self.parameters["delta"], self.parameters["R"]
+        with self.timer.phase("local-phase"):
+            with self.timer.phase("inversion"):
+                inv = numpy.linalg.inv(self.A + gamma * numpy.identity(d))
+                self.O = inv.dot(self.b)
+            with self.timer.phase("arm-scoring"):
+                exploration_term = R * sqrt(d * log((1 + (t * self.L)/gamma)/delta)) + sqrt(gamma) * log(t)
+                max_B = argmax(self.arm_scores(self.x, self.O, inv, exploration_term))
+            with self.timer.phase("pull"):
+                x_i = self.x[max_B]
+                r = self.pull(x_i, t)
+                self.s += r
+                self.increase_A += numpy.outer(x_i, x_i)
+                self.increase_b += r * x_i
+        return r
+
+    def update(self, synchronized):
+        with self.timer.phase("update"):
+            self.A += self.increase_A
+            self.b += self.increase_b
+            if synchronized:
+                self.increase_A = numpy.zeros_like(self.increase_A)
+                self.increase_b = numpy.zeros_like(self.increase_b)
+
+    def report(self):
+        """Returns the reward, the theta MSE and the execution time of the data owner."""
+        mse_theta = ((self.parameters["theta"] - self.O) ** 2).mean()
+        return self.s, mse_theta, self.timer.time
+
+
+def local_data_owner_parameters(data: DataWrapper, execution_config: ExecutionConfiguration) -> dict:
+    """Returns the parameters required by a local data owner, without the arms of all the data owners."""
+    return {
+        "d": data.d, "N": data.N, "theta": numpy.asarray(data.theta), "gamma": data.gamma, "delta": data.delta,
+        "R": data.R, "seed": execution_config.seed, "arm_scoring": execution_config.arm_scoring,
+    }
+
+
+def data_owners_worker(connection, arms, shape, data_owners_indices, parameters: dict):
+    """Entry point of a worker process, which runs the local phase of the data owners pinned on it."""
+    try:
+        # the arms of all data owners are shared by every worker without being copied
+        X = numpy.frombuffer(arms).reshape(shape)
+        noise = RewardNoise(seed=parameters["seed"], R=parameters["R"], N=parameters["N"], M=shape[0])
+        arm_scores = arm_scoring_function(parameters["arm_scoring"])
+        data_owners = [
+            LocalDataOwner(index, X[index], parameters, noise, arm_scores)
+            for index in data_owners_indices
+        ]
+        connection.send({ data_owner.index: data_owner.report() for data_owner in data_owners })
+
+        while True:
+            message = connection.recv()
+            command = message[0]
+            if command == "turn":
+                # local phase of a turn, followed by the update when no synchronization is required
+                _, t, synchronization_required = message
+                rewards = { data_owner.index: data_owner.local_phase(t) for data_owner in data_owners }
+                if synchronization_required:
+                    connection.send({
+                        data_owner.index: (rewards[data_owner.index], data_owner.increase_A, data_owner.increase_b)
+                        for data_owner in data_owners
+                    })
+                else:
+                    for data_owner in data_owners:
+                        data_owner.update(synchronized=False)
+                    connection.send({
+                        data_owner.index: (rewards[data_owner.index],) + data_owner.report()
+                        for data_owner in data_owners
+                    })
+            elif command == "update":
+                # update from the synchronized increases sent back by the server
+                _, increases = message
+                for data_owner in data_owners:
+                    data_owner.increase_A, data_owner.increase_b = increases[data_owner.index]
+                    data_owner.update(synchronized=True)
+                connection.send({ data_owner.index: data_owner.report() for data_owner in data_owners })
+            elif command == "phases":
+                connection.send({ data_owner.index: data_owner.timer.phases for data_owner in data_owners })
+            elif command == "stop":
+                break
+            else:
+                raise Exception(f"Unknown worker command: {command}")
+    except Exception:
+        connection.send(("error", format_exc()))
+    finally:
+        connection.close()
+
+
+class DataOwnersProcessPool:
+    """Persistent pool of worker processes, each of them being in charge of a fixed subset of the data owners."""
+
+    def __init__(self, data: DataWrapper, execution_config: ExecutionConfiguration, nb_workers) -> None:
+        M, K, d = data.M, data.K, data.d
+        arms = RawArray("d", M * K * d)
+        numpy.frombuffer(arms).reshape((M, K, d))[:] = numpy.asarray(data.X, dtype=float).reshape((M, K, d))
+        parameters = local_data_owner_parameters(data, execution_config)
+
+        # the data owners are dispatched in a round-robin fashion over the workers
+        nb_workers = max(1, min(nb_workers, M))
+        self.connections = []
+        self.processes = []
+        for worker_index in range(nb_workers):
+            connection, worker_connection = ProcessPipe()
+            process = Process(
+                target=data_owners_worker,
+                args=(worker_connection, arms, (M, K, d), list(range(worker_index, M, nb_workers)), parameters),
+                daemon=True
+            )
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def receive(self) -> dict:
+        """Returns the merged answers of all workers."""
+        answers = {}
+        for connection in self.connections:
+            answer = connection.recv()
+            if type(answer) == tuple and answer[0] == "error":
+                self.stop()
+                raise Exception(f"Data owner worker failed:\n{answer[1]}")
+            answers.update(answer)
+        return answers
+
+    def broadcast(self, message):
+        for connection in self.connections:
+            connection.send(message)
+
+    def turn(self, t, synchronization_required) -> dict:
+        self.broadcast(("turn", t, synchronization_required))
+        return self.receive()
+
+    def update(self, increases: dict) -> dict:
+        self.broadcast(("update", increases))
+        return self.receive()
+
+    def phases(self) -> dict:
+        """Returns the time spent in each phase by the data owners within the workers."""
+        self.broadcast(("phases",))
+        return self.receive()
+
+    def stop(self):
+        for connection in self.connections:
+            try:
+                connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join()
+
+
+def linucb_processes(
+        data: DataWrapper,
+        recording: Recording,
+        execution_config: ExecutionConfiguration,
+        security_policy: SecurityPolicy,
+        synchronization_policy: SynchronizationPolicy
+) -> Recording:
+    """Launch LinUCB where the local phase of each data owner is executed in a worker process."""
+    if execution_config.inverse_update == INVERSE_INCREMENTAL:
+        raise Exception("The processes engine only supports the direct inverse")
+    if synchronization_policy.requires_data_owners:
+        raise Exception("The processes engine only supports the synchronization policies depending on the time step")
+
+    M = data.M
+    nb_workers = execution_config.workers if execution_config.workers else cpu_count()
+
+    # ------------------------------------------------------------------------
+    # DataOwner(s)
+    # ------------------------------------------------------------------------
+    # The variables of the data owners live in the workers, while the contexts kept by the main process
+    # only receive the increases exchanged during the synchronizations.
+    data_owners = [DataOwnerContext() for _ in range(M)]
+    timer_server = Timer()
+    for data_owner_index, data_owner in enumerate(data_owners):
+        data_owner.index = data_owner_index
+        data_owner.timer = Timer()
+
+    # initialize the security policy (e.g,. initial secure communication for the rest of the protocol)
+    security_policy.init(
+        timer_server=timer_server,
+        data_owners=data_owners
+    )
+
+    # the time of a data owner is made of its time in the worker and its time in the main process
+    rewards = numpy.zeros(M)
+    theta_mse = numpy.zeros(M)
+    workers_times = numpy.zeros(M)
+
+    def read_reports(reports, offset=0):
+        for data_owner_index, report in reports.items():
+            rewards[data_owner_index], theta_mse[data_owner_index], workers_times[data_owner_index] = report[offset:]
+
+    # variables used to track the evolution of the algorithm
+    _data_by_turn = new_turn_recorder(execution_config, data.N, data.M)
+
+    def register_data_for_turn( t ):
+        # recording turn-by-turn information, at the turns of the recording schedule
+        if not _data_by_turn.records(t): return
+        _data_by_turn.record(
+            t,
+            rewards=rewards + rewards_offset,
+            theta_mse=theta_mse,
+            data_owners_times=workers_times + numpy.array([data_owner.timer.time for data_owner in data_owners]),
+            server_time=timer_server.time
         )
+        register_communication_for_turn(_data_by_turn, t, security_policy.traffic, data.M)
+        register_phases_for_turn(_data_by_turn, t, timer_server, [data_owner.timer for data_owner in data_owners])
+
+    global_start = time()
+
+    # Initialization: each worker initializes its data owners, which pull the first arm
+    pool = DataOwnersProcessPool(data, execution_config, nb_workers)
+    try:
+        read_reports(pool.receive())
+
+        # as in the naive version, each data owner adds the last reward pulled during the turn, which is only
+        # known once every worker has answered
+        rewards_offset = numpy.zeros(M)
+        nb_synchronizations = 0
+
+        # register since an arm has been pulled
+        register_data_for_turn(t=1)
+
+        # Exploration - Exploitation: Maximize the cumulative reward
+        for t in range(2, data.N):
+            for data_owner in data_owners:
+                with data_owner.timer.phase("mask-setup"):
+                    security_policy.time_step_begin(t, data_owner)
+
+            # the local phase of every data owner is performed in parallel by the workers
+            synchronization_required = synchronization_policy.requiredSynchronize( t )
+            reports = pool.turn(t, synchronization_required)
+            last_reward = reports[M - 1][0]
+
+            if synchronization_required:
+                nb_synchronizations += 1
+                # only the increases are exchanged between the workers and the server
+                for data_owner_index, (_, increase_A, increase_b) in reports.items():
+                    data_owners[data_owner_index].increase_A = increase_A
+                    data_owners[data_owner_index].increase_b = increase_b
+                security_policy.synchronize(
+                    timer_server=timer_server,
+                    data_owners=data_owners
+                )
+                read_reports(pool.update({
+                    data_owner.index: (data_owner.increase_A, data_owner.increase_b)
+                    for data_owner in data_owners
+                }))
+            else:
+                read_reports(reports, offset=1)
+
+            rewards_offset += last_reward
+
+            # recording turn-by-turn information
+            register_data_for_turn(t=t)
+        local_phases = pool.phases()
+    finally:
+        pool.stop()
+
+    # perform the recording
+    global_end = time()
+    for data_owner in data_owners:
+        data_owner.s = rewards[data_owner.index] + rewards_offset[data_owner.index]
+        data_owner.timer.time += workers_times[data_owner.index]
+        for path, elapsed in local_phases[data_owner.index].items():
+            data_owner.timer.add_phase_time(path, elapsed)
+
+    return record_linucb_execution(
+        recording=recording,
+        execution_config=execution_config,
+        global_execution_time=global_end - global_start,
+        data_by_turn=_data_by_turn,
+        timer_server=timer_server,
+        data_owners=data_owners,
+        security_policy=security_policy,
+        nb_synchronizations=nb_synchronizations
+    )
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Asynchronous Federated LINU-UCB Simulation
+# ----------------------------------------------------------------------------------------------------------------------
+class NetworkLink:
+    """Network link between a data owner and the server, modeled by a latency (s) and a bandwidth (bytes/s)."""
+
+    def __init__(self, latency, bandwidth) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def transfer_time(self, nb_bytes) -> float:
+        return self.latency + nb_bytes / self.bandwidth
+
+
+class SimulatedClock:
+    """
+    Simulated time of an entity, advanced by its measured computation time and by the arrival of the messages
+    it waits for. A second clock ignores the network, such that the exposed communication time can be deduced.
+    """
+
+    def __init__(self) -> None:
+        self.time = 0.0
+        self.computation_time = 0.0
+
+    def advance(self, duration):
+        self.time += duration
+        self.computation_time += duration
+
+    def receive(self, message):
+        self.time = max(self.time, message.arrival_time)
+        self.computation_time = max(self.computation_time, message.computation_arrival_time)
+
+
+class NetworkMessage:
+    """Serialized message sent through a network link."""
+
+    def __init__(self, sender, payload, clock: SimulatedClock, link: NetworkLink) -> None:
+        self.sender = sender
+        self.raw_data = dumps(payload)
+        self.transfer_time = link.transfer_time(len(self.raw_data))
+        self.arrival_time = clock.time + self.transfer_time
+        self.computation_arrival_time = clock.computation_time
+
+    def payload(self):
+        return loads(self.raw_data)
+
+
+def linucb_async(
+        data: DataWrapper,
+        recording: Recording,
+        execution_config: ExecutionConfiguration,
+        security_policy: SecurityPolicy,
+        synchronization_policy: SynchronizationPolicy
+) -> Recording:
+    """
+    Launch LinUCB where each data owner and the server are coroutines exchanging serialized messages
+    over simulated network links, in order to measure the end-to-end simulated time of the protocol.
+    """
+    if not isinstance(security_policy, CentralizedAdditionSecurityPolicy):
+        raise Exception("The async engine only supports the centralized addition security policies")
+    if execution_config.inverse_update == INVERSE_INCREMENTAL:
+        raise Exception("The async engine only supports the direct inverse")
+    if synchronization_policy.requires_data_owners:
+        raise Exception("The async engine only supports the synchronization policies depending on the time step")
+
+    M, N = data.M, data.N
+    link = NetworkLink(latency=execution_config.network_latency, bandwidth=execution_config.network_bandwidth)
+    parameters = local_data_owner_parameters(data, execution_config)
+    noise = RewardNoise(seed=execution_config.seed, R=data.R, N=N, M=M)
+    arm_scores = arm_scoring_function(execution_config.arm_scoring)
+    synchronization_turns = set([t for t in range(2, N) if synchronization_policy.requiredSynchronize(t)])
+
+    # ------------------------------------------------------------------------
+    # DataOwner(s)
+    # ------------------------------------------------------------------------
+    data_owners = [DataOwnerContext() for _ in range(M)]
+    timer_server = Timer()
+    for data_owner_index, data_owner in enumerate(data_owners):
+        data_owner.index = data_owner_index
+        data_owner.timer = Timer()
+
+    # initialize the security policy (e.g,. initial secure communication for the rest of the protocol)
+    security_policy.init(
+        timer_server=timer_server,
+        data_owners=data_owners
+    )
+
+    # each data owner reports its reward, theta MSE and execution time at the end of every turn
+    _data_by_turn = new_turn_recorder(execution_config, N, M)
+    reports = numpy.zeros((N, M, 3))
+    last_rewards = numpy.zeros(N)
+    server_times = numpy.zeros(N)
+    traffic_snapshots = {}
+    phases_snapshots = { t: [None] * M for t in range(1, N) if _data_by_turn.records(t) }
+    server_phases_snapshots = {}
+    local_timers = {}
+    clocks = [SimulatedClock() for _ in range(M + 1)]
+    server_clock = clocks[M]
+    communication_time = [0.0]
+
+    def phases_snapshot(*timers: Timer) -> Timer:
+        # the phases of the security policy and of the local phase are measured by distinct timers
+        snapshot = Timer()
+        for timer in timers:
+            for path, elapsed in timer.phases.items():
+                snapshot.add_phase_time(path, elapsed)
+        return snapshot
+
+    def send(queue: asyncio.Queue, sender, payload, clock: SimulatedClock):
+        message = NetworkMessage(sender, payload, clock, link)
+        communication_time[0] += message.transfer_time
+        queue.put_nowait(message)
+
+    async def data_owner_coroutine(data_owner: DataOwnerContext, inbox: asyncio.Queue, server_inbox: asyncio.Queue):
+        index = data_owner.index
+        clock = clocks[index]
+
+        def computation(phase, function, *args):
+            # the computation is measured and advances the simulated clock of the data owner
+            start = data_owner.timer.time
+            with data_owner.timer.phase(phase):
+                result = function(*args)
+            clock.advance(data_owner.timer.time - start)
+            return result
+
+        local_data_owner = LocalDataOwner(index, numpy.asarray(data.X[index], dtype=float), parameters, noise, arm_scores)
+        local_timers[index] = local_data_owner.timer
+        clock.advance(local_data_owner.timer.time)
+        reports[1, index] = local_data_owner.report()
+        if 1 in phases_snapshots: phases_snapshots[1][index] = phases_snapshot(data_owner.timer, local_data_owner.timer)
+        await asyncio.sleep(0)
+
+        for t in range(2, N):
+            computation("mask-setup", security_policy.time_step_begin, t, data_owner)
+            start = local_data_owner.timer.time
+            r = local_data_owner.local_phase(t)
+            clock.advance(local_data_owner.timer.time - start)
+            if index == M - 1: last_rewards[t] = r
+
+            synchronization_required = t in synchronization_turns
+            if synchronization_required:
+                increases = computation("encode", lambda: (
+                    security_policy.encode(local_data_owner.increase_A),
+                    security_policy.encode(local_data_owner.increase_b),
+                ))
+                payload = computation("preprocess", lambda: (
+                    security_policy.preprocess(index, increases[0]),
+                    security_policy.preprocess(index, increases[1]),
+                ))
+                security_policy.upload(index, payload)
+                send(server_inbox, index, payload, clock)
+                message = await inbox.get()
+                clock.receive(message)
+                A, b = message.payload()
+                increases = computation("postprocess", lambda: (
+                    security_policy.postprocess(index, A),
+                    security_policy.postprocess(index, b),
+                ))
+                local_data_owner.increase_A, local_data_owner.increase_b = computation("decode", lambda: (
+                    security_policy.decode(increases[0]),
+                    security_policy.decode(increases[1]),
+                ))
+
+            start = local_data_owner.timer.time
+            local_data_owner.update(synchronized=synchronization_required)
+            clock.advance(local_data_owner.timer.time - start)
+            s, mse_theta, local_time = local_data_owner.report()
+            reports[t, index] = (s, mse_theta, local_time + data_owner.timer.time)
+            if t in phases_snapshots: phases_snapshots[t][index] = phases_snapshot(data_owner.timer, local_data_owner.timer)
+
+            # let the other coroutines progress: the data owners woken up by the server handle its answer before
+            # this one begins the next turn, as the masks of the current turn are shared through the security policy
+            await asyncio.sleep(0)
+
+    async def server_coroutine(server_inbox: asyncio.Queue, inboxes: List[asyncio.Queue]):
+        for t in sorted(synchronization_turns):
+            list_A, list_b = [None] * M, [None] * M
+            for _ in range(M):
+                message = await server_inbox.get()
+                server_clock.receive(message)
+                list_A[message.sender], list_b[message.sender] = message.payload()
+
+            start = timer_server.time
+            A, b = security_policy.aggregate(timer_server, list_A, list_b)
+            server_clock.advance(timer_server.time - start)
+            server_times[t:] = timer_server.time
+
+            # each data owner is sent its part of the result, which sizes the delay of its link
+            security_policy.download((A, b), M)
+            traffic_snapshots[t] = security_policy.traffic.snapshot()
+            server_phases_snapshots[t] = phases_snapshot(timer_server)
+            for index, inbox in enumerate(inboxes):
+                send(inbox, "server", (security_policy.delivered(index, A), security_policy.delivered(index, b)), server_clock)
+
+    async def simulation():
+        server_inbox = asyncio.Queue()
+        inboxes = [asyncio.Queue() for _ in range(M)]
+        await asyncio.gather(
+            server_coroutine(server_inbox, inboxes),
+            *[
+                data_owner_coroutine(data_owner, inbox, server_inbox)
+                for data_owner, inbox in zip(data_owners, inboxes)
+            ]
+        )
+
+    global_start = time()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(simulation())
+    finally:
+        loop.close()
+    global_end = time()
+
+    # as in the naive version, each data owner adds the last reward pulled during the turn
+    rewards_offsets = numpy.cumsum(last_rewards)
+
+    # recording turn-by-turn information
+    traffic = Traffic()
+    server_phases = Timer()
+    for t in range(1, N):
+        traffic = traffic_snapshots.get(t, traffic)
+        server_phases = server_phases_snapshots.get(t, server_phases)
+        if not _data_by_turn.records(t): continue
+        _data_by_turn.record(
+            t,
+            rewards=reports[t, :, 0] + rewards_offsets[t],
+            theta_mse=reports[t, :, 1],
+            data_owners_times=reports[t, :, 2],
+            server_time=server_times[t]
+        )
+        register_communication_for_turn(_data_by_turn, t, traffic, M)
+        register_phases_for_turn(_data_by_turn, t, server_phases, phases_snapshots[t])
+
+    # perform the recording
+    for data_owner in data_owners:
+        data_owner.s = reports[N - 1, data_owner.index, 0] + rewards_offsets[N - 1]
+        data_owner.timer.time = reports[N - 1, data_owner.index, 2]
+        for path, elapsed in local_timers[data_owner.index].phases.items():
+            data_owner.timer.add_phase_time(path, elapsed)
+
+    rewards = record_linucb_execution(
+        recording=recording,
+        execution_config=execution_config,
+        global_execution_time=global_end - global_start,
+        data_by_turn=_data_by_turn,
+        timer_server=timer_server,
+        data_owners=data_owners,
+        security_policy=security_policy,
+        nb_synchronizations=len(synchronization_turns)
+    )
+
+    simulated_time = max([clock.time for clock in clocks])
+    simulated_computation_time = max([clock.computation_time for clock in clocks])
+    recording.add_simulation_recording(
+        algorithm=LINUCB_ALGORITHM,
+        algorithm_version=execution_config.algorithm_version,
+        iteration=execution_config.iteration,
+        simulated_time=simulated_time,
+        simulated_computation_time=simulated_computation_time,
+        communication_time=communication_time[0],
+        latency=link.latency,
+        bandwidth=link.bandwidth
+    )
 
     return rewards
 
@@ -534,8 +2276,13 @@ def launch_linucb(data: DataWrapper, recording: Recording, execution_config: Exe
     # select the algorithm_sync security policy depending on the algorithm version
     security_policy_selector: Switch = Switch()
     security_policy_selector.case(PLAINTEXT_VERSION, lambda: PlaintextSecurityPolicy())
-    security_policy_selector.case(SINGLE_PAILLIER_VERSION, lambda: SinglePaillierSecurityPolicy())
+    security_policy_selector.case(SINGLE_PAILLIER_VERSION, lambda: SinglePaillierSecurityPolicy(M=data.M, key_length=execution_config.paillier_key_length))
     security_policy_selector.case(MASKED_VERSION, lambda: MaskedAdditionSecurityPolicy(M=data.M))
+    security_policy_selector.case(PACKED_PAILLIER_VERSION, lambda: PackedPaillierSecurityPolicy(M=data.M, key_length=execution_config.paillier_key_length))
+    security_policy_selector.case(NUMPY_MASKED_VERSION, lambda: NumpyMaskedAdditionSecurityPolicy(M=data.M))
+    security_policy_selector.case(PAIRWISE_MASKED_VERSION, lambda: PairwiseMaskedAdditionSecurityPolicy(M=data.M))
+    security_policy_selector.case(TREE_VERSION, lambda: TreeAggregationSecurityPolicy(fan_out=execution_config.aggregation_fan_out))
+    security_policy_selector.case(MASKED_TREE_VERSION, lambda: MaskedTreeAggregationSecurityPolicy(M=data.M, fan_out=execution_config.aggregation_fan_out))
     security_policy = security_policy_selector.run(execution_config.algorithm_security)
 
     # select the algorithm_sync policy
@@ -544,13 +2291,22 @@ def launch_linucb(data: DataWrapper, recording: Recording, execution_config: Exe
     synchronization_policy_selector.case(TWO_STEPS_SYNC, lambda:  RegularStepSynchronization(n=2))
     synchronization_policy_selector.case(FOUR_STEPS_SYNC, lambda: RegularStepSynchronization(n=4))
     synchronization_policy_selector.case(NO_SYNC, lambda: NoSynchronization())
+    synchronization_policy_selector.case(ADAPTIVE_SYNC, lambda: AdaptiveSynchronization(threshold=execution_config.sync_threshold, gamma=data.gamma))
     synchronization_policy = synchronization_policy_selector.run(execution_config.algorithm_sync)
 
     if NO_SYNC == execution_config.algorithm_sync:
         assert type(synchronization_policy) == NoSynchronization
 
+    # select the engine running the protocol
+    engine_selector: Switch = Switch()
+    engine_selector.case(ENGINE_NAIVE, lambda: linucb_naive)
+    engine_selector.case(ENGINE_BATCHED, lambda: linucb_batched)
+    engine_selector.case(ENGINE_PROCESSES, lambda: linucb_processes)
+    engine_selector.case(ENGINE_ASYNC, lambda: linucb_async)
+    engine = engine_selector.run(execution_config.engine)
+
     # launch the execution
-    return linucb_naive(
+    return engine(
         data=data,
         execution_config=execution_config,
         synchronization_policy=synchronization_policy,
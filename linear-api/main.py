@@ -1,12 +1,12 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 from random import randint
 from time import time
 
 from data import DataWrapper, generate_arms_for_one_dataowner
-from execution_config import ExecutionConfiguration
-from file import JSONFileWrapper
-from linucb import LINUCB_ALGORITHM, launch_linucb, linucb_versions
-from recording import Recording, RecursiveMap
+from execution_config import ExecutionConfiguration, ARM_SCORING_LOOP, ARM_SCORING_VECTORIZED, INVERSE_DIRECT, INVERSE_INCREMENTAL, ENGINE_NAIVE, ENGINE_BATCHED, ENGINE_PROCESSES, ENGINE_ASYNC, DEFAULT_PAILLIER_KEY_LENGTH
+from file import JSONFileWrapper, file_wrapper, FORMAT_JSON, FORMAT_COLUMNAR, COLUMNAR_SUFFIX
+from linucb import LINUCB_ALGORITHM, SECURITY_VERSIONS, ALL_SYNC_VERSIONS, SYNC_VERSIONS, SINGLE_PAILLIER_VERSION, PACKED_PAILLIER_VERSION, PaillierKeyManager, launch_linucb, linucb_versions
+from recording import Recording, RecordingSchedule, RecursiveMap, DEFAULT_RECORDING_SCHEDULE, RECORDER_VERSION, RECORDER_VERSION_KEY, migrate_recording
 
 
 def generate_random_seed(): return randint(1, 1000)
@@ -44,6 +44,94 @@ from multiprocessing import Pool, Lock
 
 
 import tqdm
+from os import environ
+from os.path import abspath, dirname
+from hashlib import sha256
+try:
+    from os import sched_getaffinity, sched_setaffinity
+except ImportError:
+    # the pinning of the workers to a core is only available on Linux
+    sched_getaffinity, sched_setaffinity = None, None
+from multiprocessing import get_context
+
+
+def create_execution_configuration(args, algorithm, algorithm_security, algorithm_sync, iteration) -> ExecutionConfiguration:
+    """Returns the configuration of a benchmark task, seeded by its iteration."""
+    return ExecutionConfiguration(
+        algorithm=algorithm,
+        algorithm_security=algorithm_security,
+        algorithm_sync=algorithm_sync,
+        nbIteration=args.iteration,
+        iteration=iteration,
+        seed=iteration,
+        arm_scoring=args.arm_scoring,
+        inverse_update=args.inverse_update,
+        reinversion_period=args.reinversion_period,
+        engine=args.engine,
+        workers=args.workers,
+        network_latency=args.network_latency,
+        network_bandwidth=args.network_bandwidth,
+        aggregation_fan_out=args.aggregation_fan_out,
+        paillier_key_length=args.paillier_key_length,
+        sync_threshold=args.sync_threshold,
+        recording_schedule=args.recording_schedule
+    )
+
+
+# the data of the inputs already read by the process, tasks of the same input being run by the same workers
+_data_by_input = {}
+
+def run_benchmark_task( task ):
+    """
+    Runs a single (input, algorithm, version, iteration) execution in a recording of its own and returns the
+    task with its result fragment, i.e. the recording of the iteration.
+    """
+    args, input, algorithm, algorithm_security, algorithm_sync, iteration = task
+    if input not in _data_by_input:
+        _data_by_input[input] = DataWrapper.from_file(input)
+    data = _data_by_input[input]
+
+    execution_config = create_execution_configuration(args, algorithm, algorithm_security, algorithm_sync, iteration)
+    recording = Recording.new()
+    if algorithm == LINUCB_ALGORITHM:
+        launch_linucb(data, recording, execution_config)
+    else:
+        raise Exception(f"Algorithm not found: {algorithm}")
+
+    fragment = recording.root.get([algorithm, execution_config.algorithm_version, f"it-{iteration}"]).export()
+    return task[1:], fragment
+
+
+def checkpoint_filename( args, input, algorithm, algorithm_version, iteration ) -> str:
+    """Returns the file in which the result fragment of a task is persisted as soon as the task is done."""
+    return f"{args.output}/checkpoints/{input}/{algorithm}/{algorithm_version}/it-{iteration}.json"
+
+
+def input_digest( input ) -> str:
+    """Returns the digest of an input file, such that a checkpoint is not restored once its input has changed."""
+    with open(input, "rb") as file:
+        return sha256(file.read()).hexdigest()
+
+
+def checkpoint_configuration( args, digest, algorithm, algorithm_security, algorithm_sync, iteration ) -> dict:
+    """
+    Returns the configuration a task result depends on, stored with its checkpoint: a checkpoint of another
+    configuration is stale and its task is run again.
+    """
+    execution_config = create_execution_configuration(args, algorithm, algorithm_security, algorithm_sync, iteration)
+    configuration = dict(execution_config.__dict__)
+    # the number of iterations of the benchmark does not change the result of one of them
+    del configuration["nbIteration"]
+    configuration["input-digest"] = digest
+    return configuration
+
+
+def pin_benchmark_worker( cores ):
+    """Pins the worker to a core of its own, such that the timings of a task are not polluted by other tasks."""
+    if sched_setaffinity is not None:
+        sched_setaffinity(0, {cores.get()})
+
+
 def launch_benchmark( args ):
     print(f"Binding recording file from {args.output} [DISABLED]" )
     nbIteration = args.iteration
@@ -54,56 +142,125 @@ def launch_benchmark( args ):
     ]
 
     VERSIONS = {
-        LINUCB_ALGORITHM: linucb_versions( with_security=not args.without_security )
+        LINUCB_ALGORITHM: linucb_versions( with_security=not args.without_security, securities=args.securities, syncs=args.syncs )
     }
 
+    if args.jobs > 1 and args.engine == ENGINE_PROCESSES:
+        raise Exception("The processes engine already runs in several processes: it cannot be used with several jobs")
+
+    # the Paillier key pair is generated in background while the first versions are running
+    if any(algorithm_security in [SINGLE_PAILLIER_VERSION, PACKED_PAILLIER_VERSION] for algorithm_security, _ in VERSIONS[LINUCB_ALGORITHM]):
+        PaillierKeyManager.pool.prefetch(args.paillier_key_length)
+
     # we maintains a mapping between the input and the associated results
     fragment_by_input = RecursiveMap(root={})
-
-    for input in tqdm.tqdm(args.inputs, desc="Input"):
+    # the inputs read by a previous benchmark of the same process may have changed since
+    _data_by_input.clear()
+
+    # each (input, algorithm, version, iteration) execution is an independent task
+    tasks = []
+    recording_by_input = {}
+    digest_by_input = {}
+    nb_remaining_tasks_by_input = {}
+    nb_stale_checkpoints = 0
+
+    def add_task_result( input, algorithm, algorithm_security, algorithm_sync, iteration, fragment ):
+        input_recording = recording_by_input[input]
+        input_recording.add_execution_configuration(
+            create_execution_configuration(args, algorithm, algorithm_security, algorithm_sync, iteration)
+        )
+        input_recording.add_iteration_recording(algorithm, f"{algorithm_security}.{algorithm_sync}", iteration, fragment)
+
+    def restore_task_result( input, algorithm, algorithm_security, algorithm_sync, iteration ):
+        nonlocal nb_stale_checkpoints
+        checkpoint_file = JSONFileWrapper(checkpoint_filename(args, input, algorithm, f"{algorithm_security}.{algorithm_sync}", iteration))
+        if not checkpoint_file.exists(): return
+        checkpoint = checkpoint_file.read()
+        # a checkpoint written under another configuration is stale, its task being run again
+        configuration = checkpoint_configuration(args, digest_by_input[input], algorithm, algorithm_security, algorithm_sync, iteration)
+        if checkpoint.get("configuration") != configuration:
+            nb_stale_checkpoints += 1
+            return
+        add_task_result(input, algorithm, algorithm_security, algorithm_sync, iteration, checkpoint["fragment"])
+
+    def record_task_result( task, fragment ):
+        input, algorithm, algorithm_security, algorithm_sync, iteration = task
+        # the fragment is persisted first, such that a crash never loses a task which is done
+        configuration = checkpoint_configuration(args, digest_by_input[input], algorithm, algorithm_security, algorithm_sync, iteration)
+        JSONFileWrapper(checkpoint_filename(args, input, algorithm, f"{algorithm_security}.{algorithm_sync}", iteration)).write({
+            "configuration": configuration,
+            "fragment": fragment
+        })
+        add_task_result(input, algorithm, algorithm_security, algorithm_sync, iteration, fragment)
+
+        # the recording of an input is merged as soon as all its tasks are done
+        nb_remaining_tasks_by_input[input] -= 1
+        if nb_remaining_tasks_by_input[input] == 0:
+            recording_by_input[input].merge_and_export()
+
+    for input in args.inputs:
         # define the output location
         output_filename = f"{args.output}/fragments/{input}"
+        if args.recording_format == FORMAT_COLUMNAR:
+            output_filename += COLUMNAR_SUFFIX
 
         # read the input file
         input_file = JSONFileWrapper( input )
         fragment_by_input[[input, 'input']] = input_file.read()
         fragment_by_input[[input, 'output']] = output_filename
 
+        digest_by_input[input] = input_digest(input)
         input_recording: Recording = Recording.new(filename=output_filename)
-        data = DataWrapper.from_file(input)
-        for algorithm in tqdm.tqdm(ALGORITHMS,desc="Algorithm"):
-            for iteration in tqdm.tqdm(range(nbIteration),desc="Iteration"):
-                seed = iteration
-                input_recording.add_data_recording(data=data)
-                for algorithm_security, algorithm_sync in tqdm.tqdm(VERSIONS[algorithm],desc="Version"):
+        input_recording.add_data_recording(data=DataWrapper.from_file(input))
+        recording_by_input[input] = input_recording
+        nb_remaining_tasks_by_input[input] = 0
+        for algorithm in ALGORITHMS:
+            for iteration in range(nbIteration):
+                for algorithm_security, algorithm_sync in VERSIONS[algorithm]:
                     algorithm_version = f"{algorithm_security}.{algorithm_sync}"
+                    # the tasks done by a previous (possibly crashed) benchmark are restored from their checkpoint
+                    restore_task_result(input, algorithm, algorithm_security, algorithm_sync, iteration)
+
                     # Skipping the execution is already exists in the recording
                     if not input_recording.contains_entry(algorithm, algorithm_version, iteration):
-                        # creating the execution configuration
-                        execution_config = ExecutionConfiguration(
-                            algorithm=algorithm,
-                            algorithm_security=algorithm_security,
-                            algorithm_sync=algorithm_sync,
-                            nbIteration=nbIteration,
-                            iteration=iteration,
-                            seed=seed
-                        )
-                        input_recording.add_execution_configuration(execution_config)
-
-                        # launch the execution
-                        if algorithm == LINUCB_ALGORITHM:
-                            launch_linucb(data, input_recording, execution_config)
-                        else:
-                            raise Exception(f"Algorithm not found: {algorithm}")
-
-        input_recording.merge_and_export()
+                        tasks.append((args, input, algorithm, algorithm_security, algorithm_sync, iteration))
+                        nb_remaining_tasks_by_input[input] += 1
+
+        # the merged recording of an input is rebuilt at once when all its tasks were already done
+        if nb_remaining_tasks_by_input[input] == 0:
+            input_recording.merge_and_export()
+
+    nb_done_tasks = sum([ len(VERSIONS[algorithm]) for algorithm in ALGORITHMS ]) * nbIteration * len(args.inputs) - len(tasks)
+    if nb_done_tasks > 0:
+        print(f"[*] Resuming the benchmark: {nb_done_tasks} tasks already done, {len(tasks)} remaining")
+    if nb_stale_checkpoints > 0:
+        print(f"[*] {nb_stale_checkpoints} checkpoints of another configuration: their tasks are run again")
+
+    if args.jobs == 1:
+        for task in tqdm.tqdm(tasks, desc="Task"):
+            record_task_result(*run_benchmark_task(task))
+    else:
+        # one single-threaded worker per core: the linear algebra library must not spread a task over several cores
+        for variable in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+            environ.setdefault(variable, "1")
+        context = get_context("spawn")
+        cores = context.Queue()
+        available_cores = sorted(sched_getaffinity(0)) if sched_getaffinity is not None else range(args.jobs)
+        for core in available_cores:
+            cores.put(core)
+        nb_jobs = min(args.jobs, len(available_cores))
+        if nb_jobs < args.jobs:
+            print(f"[*] Only {nb_jobs} cores available: running {nb_jobs} jobs instead of {args.jobs}")
+
+        with context.Pool(processes=nb_jobs, initializer=pin_benchmark_worker, initargs=(cores,)) as pool:
+            for task, fragment in tqdm.tqdm(pool.imap_unordered(run_benchmark_task, tasks), total=len(tasks), desc="Task"):
+                record_task_result(task, fragment)
 
     # export the inputs/fragments mapping in a file
     inputs_fragments_file = JSONFileWrapper(f"{args.output}/fragments.json")
     inputs_fragments_file.write( fragment_by_input.export() )
 
 
-
             
 
 
@@ -274,6 +431,48 @@ def generate_data(args):
     else:
         generate_limited_data(args)
 
+def convert_results(args):
+    """
+    Converts the recordings of results directories to another format, migrating those of a previous recorder version
+    to the current one. The outputs listed in the fragments.json file of a results directory are relative to its
+    parent directory, the data directory read by the API.
+    """
+    for results_directory in args.results:
+        data_directory = dirname(abspath(results_directory))
+        fragments_file = JSONFileWrapper(f"{results_directory}/fragments.json")
+        fragments = fragments_file.read()
+        for input, input_entry in fragments.items():
+            output = input_entry["output"]
+            if output.endswith(COLUMNAR_SUFFIX):
+                converted_output = output[:-len(COLUMNAR_SUFFIX)] if args.to == FORMAT_JSON else output
+            else:
+                converted_output = output + COLUMNAR_SUFFIX if args.to == FORMAT_COLUMNAR else output
+            recording = file_wrapper(f"{data_directory}/{output}").read()
+            outdated = recording[RECORDER_VERSION_KEY] != RECORDER_VERSION
+            if converted_output == output and not outdated: continue
+
+            print(f"[*] Converting {output} to {converted_output}")
+            if outdated: recording = migrate_recording(recording)
+            file_wrapper(f"{data_directory}/{converted_output}").write(recording)
+            input_entry["output"] = converted_output
+
+        # the mapping is updated once all the recordings are converted, the previous recordings being kept
+        fragments_file.write(fragments)
+        print(f"[V] Conversion of {results_directory} done")
+
+def positive_integer(value: str) -> int:
+    if int(value) < 1:
+        raise ArgumentTypeError(f"{value} is not a positive integer")
+    return int(value)
+
+def recording_schedule(schedule: str) -> str:
+    """Checks the recording schedule given on the command line."""
+    try:
+        RecordingSchedule.parse(schedule)
+    except Exception as exception:
+        raise ArgumentTypeError(f"invalid recording schedule {schedule}: {exception}")
+    return schedule
+
 def create_parser():
     """Returns a parser configured with arguments."""
     parser = ArgumentParser()
@@ -285,7 +484,27 @@ def create_parser():
     bench_parser.add_argument("--inputs", nargs="+", required=True)
     bench_parser.add_argument("--output", required=True)
     bench_parser.add_argument("--without-security", required=False, action="store_true")
+    bench_parser.add_argument("--securities", nargs="+", choices=SECURITY_VERSIONS, required=False, help="Security versions to benchmark (default: plaintext and masked versions).")
+    bench_parser.add_argument("--syncs", nargs="+", choices=ALL_SYNC_VERSIONS, default=SYNC_VERSIONS, help="Synchronization versions to benchmark (default: the regular ones).")
+    bench_parser.add_argument("--sync-threshold", type=float, default=2.0, help="Determinant ratio of A since the last synchronization that triggers the adaptive synchronization.")
+    bench_parser.add_argument("--engine", choices=[ENGINE_NAIVE, ENGINE_BATCHED, ENGINE_PROCESSES, ENGINE_ASYNC], default=ENGINE_NAIVE, help="Runs the data owners one after the other, all at once with stacked arrays, in worker processes or as coroutines over a simulated network.")
+    bench_parser.add_argument("--network-latency", type=float, default=0.01, help="Latency (in seconds) of the links simulated by the async engine.")
+    bench_parser.add_argument("--network-bandwidth", type=float, default=125e6, help="Bandwidth (in bytes per second) of the links simulated by the async engine.")
+    bench_parser.add_argument("--aggregation-fan-out", type=int, default=4, help="Number of tensors combined by each aggregator of the tree-version and masked-tree-version securities.")
+    bench_parser.add_argument("--paillier-key-length", type=int, default=DEFAULT_PAILLIER_KEY_LENGTH, help="Length (in bits) of the Paillier keys used by the Paillier security versions.")
+    bench_parser.add_argument("--recording-schedule", type=recording_schedule, default=DEFAULT_RECORDING_SCHEDULE, help="Turns at which the turn-by-turn data is recorded: every:k (every k turns), log:n (n log-spaced turns) or list:t1,t2,... (explicit turns).")
+    bench_parser.add_argument("--recording-format", choices=[FORMAT_JSON, FORMAT_COLUMNAR], default=FORMAT_JSON, help="Exports the recordings as JSON documents or as columnar directories of memory-mappable arrays.")
+    bench_parser.add_argument("--jobs", type=positive_integer, default=1, help="Number of executions run in parallel, each one in a process pinned to its own core.")
+    bench_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes used by the processes engine (default: number of CPUs).")
+    bench_parser.add_argument("--arm-scoring", choices=[ARM_SCORING_VECTORIZED, ARM_SCORING_LOOP], default=ARM_SCORING_VECTORIZED, help="Computes the UCB score of the arms all at once or arm by arm.")
+    bench_parser.add_argument("--inverse-update", choices=[INVERSE_DIRECT, INVERSE_INCREMENTAL], default=INVERSE_DIRECT, help="Inverts the design matrix at each turn or maintains its inverse with low-rank updates.")
+    bench_parser.add_argument("--reinversion-period", type=int, default=50, help="Number of turns between two full re-inversions of an incrementally maintained inverse.")
     
+    convert_parser = subparsers.add_parser("convert")
+    convert_parser.set_defaults(func=convert_results)
+    convert_parser.add_argument("--results", nargs="+", required=True, help="Results directories (e.g. data/*/results) whose recordings are converted.")
+    convert_parser.add_argument("--to", choices=[FORMAT_JSON, FORMAT_COLUMNAR], default=FORMAT_COLUMNAR, help="Format of the converted recordings.")
+
     data_parser = subparsers.add_parser("data")
     data_parser.set_defaults(func=generate_data)
     data_parser.add_argument("--mode", choices=["full", "max"], help="Specify the mode to generate data.", default="max", required=True)
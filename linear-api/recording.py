@@ -1,11 +1,14 @@
 from typing import Any, Iterable, List
+from collections import OrderedDict
+from threading import Lock
+import os
 from pipe import Pipe
 
 from api_model import Configuration
 from data import DataWrapper
-from file import JSONFileWrapper
+from file import file_wrapper, COLUMNAR_HEADER_FILENAME
 from execution_config import ExecutionConfiguration
-from copy import deepcopy
+import numpy
 
 # we will annote each output produced by the recording object with a recording version
 SYNC_VERSIONS = [
@@ -20,7 +23,9 @@ SEC_VERSIONS = [
     "masked-version",
 ]
 
-RECORDER_VERSION = "2"
+RECORDER_VERSION = "3"
+# the version 2 recorded the turn-by-turn data as one map per turn instead of columns
+MIGRATED_RECORDER_VERSIONS = ["2"]
 RECORDER_VERSION_KEY = "recorder-version"
 RECORDER_DATA_KEY = "recording-data"
 
@@ -33,6 +38,18 @@ ALGORITHM_KEYS = "algorithm"
 ALGORITHM_VERSION = "algorithm-version"
 SEED_KEY = "seed"
 REWARD_SEED_KEY = "reward-seed"
+ARM_SCORING_KEY = "arm-scoring"
+ENGINE_KEY = "engine"
+INVERSE_UPDATE_KEY = "inverse-update"
+NB_REINVERSIONS_KEY = "nb-reinversions"
+MAX_DRIFT_KEY = "max-drift"
+NB_LOW_RANK_UPDATES_KEY = "nb-low-rank-updates"
+NB_FALLBACK_REINVERSIONS_KEY = "nb-fallback-reinversions"
+MAX_FALLBACK_DRIFT_KEY = "max-fallback-drift"
+SIMULATED_TIME_KEY = "simulated-time"
+SIMULATION_KEY = "simulation"
+SECURITY_KEY = "security"
+NB_SYNCHRONIZATIONS_KEY = "nb-synchronizations"
 DATA_KEY = "data"
 
 # Description keys
@@ -43,6 +60,18 @@ REWARDS_KEY = "rewards"
 ENTITIES_KEY = "entities"
 TURN_BY_TURN_KEY = "turn-by-turn"
 THETA_MSE_KEY = "theta-mse"
+COMMUNICATION_KEY = "communication"
+SENT_BYTES_KEY = "sent-bytes"
+RECEIVED_BYTES_KEY = "received-bytes"
+PHASES_KEY = "phases"
+TURNS_KEY = "turns"
+RECORDING_SCHEDULE_KEY = "recording-schedule"
+
+# Recording schedules
+SCHEDULE_EVERY = "every"
+SCHEDULE_LOG = "log"
+SCHEDULE_LIST = "list"
+DEFAULT_RECORDING_SCHEDULE = "every:1"
 
 
 class RecursiveMap:
@@ -139,6 +168,113 @@ class RecursiveMap:
         return self.root
 
 
+# marks a missing leaf, as a leaf may be None
+MISSING = object()
+
+class FlatRecursiveMap:
+    """
+    Map with the interface of RecursiveMap, whose leaves are stored in a single flat table indexed by the tuple of
+    their keys. A sub-tree is a view sharing the tables of the map, restricted to the paths of its prefix: a lookup is
+    a single dictionary access whatever the depth, and a sub-tree is never copied.
+    """
+    __slots__ = ("leaves", "children", "prefix")
+
+    def __init__(self, root={}, leaves=None, children=None, prefix=()) -> None:
+        # the leaves by path, and the keys of the children of each inner node by path (ordered as inserted)
+        self.leaves = {} if leaves is None else leaves
+        self.children = { (): {} } if children is None else children
+        self.prefix = prefix
+        if leaves is None:
+            self.put_path((), root)
+
+    def __setitem__(self, keys, value):
+        self.put(keys, value)
+
+    def __getitem__(self, keys):
+        return self.get(keys)
+
+    def __str__(self):
+        return str(self.export())
+
+    def __iter__(self):
+        return self.items()
+
+    def keys(self):
+        return self.children[self.prefix].keys()
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        for key in self.children[self.prefix]:
+            yield (key, self.get_path(self.prefix + (key,)))
+
+    def view(self, path):
+        """Returns the sub-tree under the path, sharing the tables of the map."""
+        view = FlatRecursiveMap.__new__(FlatRecursiveMap)
+        view.leaves, view.children, view.prefix = self.leaves, self.children, path
+        return view
+
+    def tree_of_keys(self):
+        return RecursiveMap(root=self.export()).tree_of_keys()
+
+    def put(self, keys: Iterable, value: Any):
+        """Puts a new value under the (possible multiple) keys"""
+        self.put_path(self.prefix + tuple(keys), value)
+
+    def put_path(self, path, value):
+        self.remove_path(path)
+        if type(value) == dict:
+            self.children[path] = {}
+            for key, item in value.items():
+                self.put_path(path + (key,), item)
+        else:
+            self.leaves[path] = value
+        # registers the path in its ancestors, up to the first one which already knows it
+        for depth in range(len(path) - 1, -1, -1):
+            assert path[:depth] not in self.leaves, path[:depth]
+            keys = self.children.setdefault(path[:depth], {})
+            if path[depth] in keys: break
+            keys[path[depth]] = None
+
+    def remove_path(self, path):
+        if path in self.leaves:
+            del self.leaves[path]
+        elif path in self.children:
+            for key in self.children.pop(path):
+                self.remove_path(path + (key,))
+
+    def get(self, keys: Iterable, default=None):
+        """Returns the value stored under the (possible multiple) keys"""
+        path = self.prefix + tuple(keys) if self.prefix else tuple(keys)
+        leaf = self.leaves.get(path, MISSING)
+        if leaf is not MISSING:
+            return leaf
+        if path in self.children:
+            return self.view(path)
+        if default:
+            return default
+        raise Exception(f"Key {'/'.join(keys)} not in the map")
+
+    def get_path(self, path):
+        # this map can return either a leaf or a sub graph
+        if path in self.leaves:
+            return self.leaves[path]
+        return self.view(path)
+
+    def has(self, keys: Iterable) -> bool:
+        """Returns True if the (possible multiple) key is contained in the map."""
+        path = self.prefix + tuple(keys)
+        return path in self.leaves or path in self.children
+
+    def export(self):
+        """Returns the map as nested dictionaries, sharing the leaves."""
+        def internal( path ):
+            if path in self.leaves: return self.leaves[path]
+            return { key: internal(path + (key,)) for key in self.children[path] }
+        return internal(self.prefix)
+
+
 
 @Pipe
 def mean( values ):
@@ -150,40 +286,292 @@ def merge_lists( list_of_list ):
 
     # ensures that all lists of the same length
     first_list_length = len(list_of_list[0])
-    for list in list_of_list:
-        if len(list) != first_list_length:
+    for values in list_of_list:
+        if len(values) != first_list_length:
             raise Exception("All list does not have the same length")
-    # computes the minimum
+    # computes the mean, rows of the turn-by-turn columns being merged element-wise
     return [
-        [ list[index] for list in list_of_list ] | mean
+        merge_lists([ values[index] for values in list_of_list ]) if type(list_of_list[0][index]) == list
+        else [ values[index] for values in list_of_list ] | mean
         for index in range(first_list_length)
     ]
 
-def merge_recursive_maps( list_maps : List[RecursiveMap], merge_strategy = "uniq" ):
-    def internal( keys, res : RecursiveMap ):
-        for key, item in list_maps[0][keys].items():
+def merge_series( list_series ):
+    """
+    Returns the element-wise mean of series of the same shape, e.g. the turn-by-turn columns of several iterations,
+    stacked into a single array and reduced at once. Integer series stay integers when their mean is integral.
+    """
+    try:
+        stacked_series = numpy.asarray(list_series)
+    except (ValueError, TypeError):
+        stacked_series = None
+    if stacked_series is None or stacked_series.dtype.kind not in "iuf":
+        # series which have not the same shape or which are not numeric
+        return merge_lists(list_series)
+    merged_series = stacked_series.mean(axis=0)
+    if stacked_series.dtype.kind in "iu" and (merged_series == numpy.rint(merged_series)).all():
+        merged_series = merged_series.astype(stacked_series.dtype)
+    return merged_series.tolist()
+
+def merge_numbers( values ):
+    """Returns the mean of numbers, an integer when they all are integers of integral mean."""
+    if all(type(value) == int for value in values) and sum(values) % len(values) == 0:
+        return sum(values) // len(values)
+    return values | mean
 
-            if type(item) == RecursiveMap:
-                internal( keys + [key], res )
-            elif type(item) == list:
-                res[ keys + [key] ] = merge_lists([ map[keys + [key]] for map in list_maps ])
+def merge_recursive_maps( list_maps : List[RecursiveMap], merge_strategy = "uniq" ):
+    def internal( keys, nodes ):
+        res = {}
+        for key, item in nodes[0].items():
+            if not all(key in node for node in nodes):
+                raise Exception(f"Key {'/'.join(keys + [key])} not in all the maps")
+            values = [node[key] for node in nodes]
+
+            if type(item) == dict:
+                merged_node = internal( keys + [key], values )
+                # as the leaves, the sub-trees without any merged leaf are not kept
+                if merged_node: res[key] = merged_node
+            elif type(item) == list or isinstance(item, numpy.ndarray):
+                res[key] = merge_series(values)
             elif type(item) == int or type(item) == float:
-                res[ keys + [key] ] = [ map[keys + [key]] for map in list_maps ] | mean
+                res[key] = merge_numbers(values)
             else:
                 if merge_strategy == "join":
-                    res[keys + [key]] = [map[keys + [key]] for map in list_maps]
+                    res[key] = values
+                elif merge_strategy == "mean":
+                    # values that cannot be averaged are kept when all iterations agree on them
+                    if len(set(values)) == 1:
+                        res[key] = values[0]
                 elif merge_strategy == "uniq":
-                    values = [map[keys + [key]] for map in list_maps]
                     if len(set(values)) == 1:
-                        res[ keys + [key] ] = values[0]
+                        res[key] = values[0]
                     else:
                         raise Exception(f"Two different values under the same key {keys + [key]}: {values}")
 
                 elif merge_strategy == "fault":
                     raise Exception("Keys " + str(keys + [key]) + " cannot be merge: type " + str(type(item)))
-    res = RecursiveMap(root={})
-    internal( [], res )
-    return res
+        return res
+
+    return RecursiveMap(root=internal( [], [map.export() for map in list_maps] ))
+
+
+class RecordingSchedule:
+    """
+    Turns at which the turn-by-turn data of a run is recorded, written as "every:k" (every k turns), "log:n"
+    (n log-spaced turns) or "list:t1,t2,..." (explicit turns). The first and the last turns are always recorded,
+    except for an explicit list.
+    """
+
+    def __init__(self, kind, argument) -> None:
+        if kind not in [SCHEDULE_EVERY, SCHEDULE_LOG, SCHEDULE_LIST]:
+            raise Exception(f"Unknown recording schedule: {kind}")
+        if kind in [SCHEDULE_EVERY, SCHEDULE_LOG] and argument < 1:
+            raise Exception(f"The {kind} recording schedule expects a positive integer, not {argument}")
+        self.kind = kind
+        self.argument = argument
+
+    @staticmethod
+    def parse(schedule: str):
+        kind, _, argument = schedule.partition(":")
+        if kind == SCHEDULE_LIST:
+            return RecordingSchedule(kind, sorted(set([int(turn) for turn in argument.split(",") if turn])))
+        return RecordingSchedule(kind, int(argument))
+
+    def turns(self, N) -> List[int]:
+        """Returns the recorded turns of a run of N time steps, whose turns go from 1 to N - 1."""
+        last_turn = max(N - 1, 1)
+        if self.kind == SCHEDULE_EVERY:
+            turns = list(range(1, last_turn + 1, self.argument))
+        elif self.kind == SCHEDULE_LOG:
+            turns = numpy.unique(numpy.rint(numpy.geomspace(1, last_turn, self.argument)).astype(int)).tolist()
+        else:
+            return [turn for turn in self.argument if 1 <= turn <= last_turn]
+        if turns[-1] != last_turn: turns.append(last_turn)
+        return turns
+
+    def __str__(self) -> str:
+        if self.kind == SCHEDULE_LIST:
+            return f"{self.kind}:" + ",".join([str(turn) for turn in self.argument])
+        return f"{self.kind}:{self.argument}"
+
+
+class TurnRecorder:
+    """
+    Turn-by-turn recording of a run: columns preallocated for the recorded turns, one row per turn and, for the
+    data owners, one column per data owner, filled by index. Sums are not stored, they are computed when read.
+    The recorded quantities being cumulative, they are exact at the recorded turns whatever the schedule.
+    """
+
+    def __init__(self, turns: List[int], M, schedule: RecordingSchedule = None) -> None:
+        nb_turns = len(turns)
+        self.turns = turns
+        self.schedule = schedule
+        self.row_by_turn = { turn: row for row, turn in enumerate(turns) }
+        self.nb_turns = nb_turns
+        self.M = M
+        self.rewards = numpy.zeros((nb_turns, M))
+        self.theta_mse = numpy.zeros((nb_turns, M))
+        self.data_owners_times = numpy.zeros((nb_turns, M))
+        self.server_times = numpy.zeros(nb_turns)
+        self.data_owners_sent_bytes = numpy.zeros((nb_turns, M), dtype=numpy.int64)
+        self.data_owners_received_bytes = numpy.zeros((nb_turns, M), dtype=numpy.int64)
+        self.server_sent_bytes = numpy.zeros(nb_turns, dtype=numpy.int64)
+        self.server_received_bytes = numpy.zeros(nb_turns, dtype=numpy.int64)
+        # phases are only known once entered, their column is allocated then (the time spent before being zero)
+        self.data_owners_phases = {}
+        self.server_phases = {}
+
+    def records(self, t) -> bool:
+        """Returns True if the turn t is recorded."""
+        return t in self.row_by_turn
+
+    def record(self, t, rewards, theta_mse, data_owners_times, server_time):
+        """Puts the cumulative rewards, the theta MSE and the execution times of the entities at turn t."""
+        row = self.row_by_turn[t]
+        self.rewards[row] = rewards
+        self.theta_mse[row] = theta_mse
+        self.data_owners_times[row] = data_owners_times
+        self.server_times[row] = server_time
+
+    def record_communication(self, t, data_owners_sent, data_owners_received, server_sent, server_received):
+        """Puts the bytes sent and received by the entities since the beginning of the execution, at turn t."""
+        row = self.row_by_turn[t]
+        self.data_owners_sent_bytes[row] = data_owners_sent
+        self.data_owners_received_bytes[row] = data_owners_received
+        self.server_sent_bytes[row] = server_sent
+        self.server_received_bytes[row] = server_received
+
+    def record_phases(self, t, data_owners_phases: dict, server_phases: dict):
+        """Puts the time spent in each phase by the entities since the beginning of the execution, at turn t."""
+        row = self.row_by_turn[t]
+        for path, elapsed in data_owners_phases.items():
+            if path not in self.data_owners_phases:
+                self.data_owners_phases[path] = numpy.zeros((self.nb_turns, self.M))
+            self.data_owners_phases[path][row] = elapsed
+        for path, elapsed in server_phases.items():
+            if path not in self.server_phases:
+                self.server_phases[path] = numpy.zeros(self.nb_turns)
+            self.server_phases[path][row] = elapsed
+
+    def rewards_sum(self) -> numpy.ndarray: return self.rewards.sum(axis=1)
+
+    def theta_mse_sum(self) -> numpy.ndarray: return self.theta_mse.sum(axis=1)
+
+    def theta_mse_mean(self) -> numpy.ndarray: return self.theta_mse.mean(axis=1)
+
+    def times_sum(self) -> numpy.ndarray: return self.server_times + self.data_owners_times.sum(axis=1)
+
+    def communication_sum(self) -> numpy.ndarray:
+        """Returns the number of bytes that crossed the network, each byte being sent once."""
+        return self.server_sent_bytes + self.data_owners_sent_bytes.sum(axis=1)
+
+    def export(self):
+        return {
+            TURNS_KEY: self.turns,
+            REWARDS_KEY: self.rewards.tolist(),
+            THETA_MSE_KEY: self.theta_mse.tolist(),
+            EXECUTION_TIME_KEY: {
+                "data-owners": self.data_owners_times.tolist(),
+                "server": self.server_times.tolist(),
+            },
+            COMMUNICATION_KEY: {
+                "data-owners": {
+                    "sent": self.data_owners_sent_bytes.tolist(),
+                    "received": self.data_owners_received_bytes.tolist(),
+                },
+                "server": {
+                    "sent": self.server_sent_bytes.tolist(),
+                    "received": self.server_received_bytes.tolist(),
+                },
+            },
+            PHASES_KEY: {
+                "data-owners": { path: elapsed.tolist() for path, elapsed in self.data_owners_phases.items() },
+                "server": { path: elapsed.tolist() for path, elapsed in self.server_phases.items() },
+            },
+        }
+
+    @staticmethod
+    def from_export(columns: dict):
+        """Returns the recorder of exported columns, possibly merged over several iterations."""
+        rewards = numpy.asarray(columns[REWARDS_KEY], dtype=float)
+        nb_turns = len(columns[TURNS_KEY]) if TURNS_KEY in columns else len(rewards)
+        # an empty export has no data owner column, a single data owner may be exported as a flat column
+        M = rewards.size // nb_turns if nb_turns else 0
+        def data_owners_column(values, dtype=None): return numpy.asarray(values, dtype=dtype).reshape(nb_turns, M)
+        def server_column(values, dtype=None): return numpy.asarray(values, dtype=dtype).reshape(nb_turns)
+
+        # the turns averaged over several iterations are floats
+        turns = [int(turn) for turn in columns.get(TURNS_KEY, range(1, nb_turns + 1))]
+        recorder = TurnRecorder(turns, M)
+        recorder.rewards = rewards.reshape(nb_turns, M)
+        recorder.theta_mse = data_owners_column(columns[THETA_MSE_KEY], dtype=float)
+        recorder.data_owners_times = data_owners_column(columns[EXECUTION_TIME_KEY]["data-owners"], dtype=float)
+        recorder.server_times = server_column(columns[EXECUTION_TIME_KEY]["server"], dtype=float)
+        # the bytes averaged over several iterations are not integers anymore
+        recorder.data_owners_sent_bytes = data_owners_column(columns[COMMUNICATION_KEY]["data-owners"]["sent"])
+        recorder.data_owners_received_bytes = data_owners_column(columns[COMMUNICATION_KEY]["data-owners"]["received"])
+        recorder.server_sent_bytes = server_column(columns[COMMUNICATION_KEY]["server"]["sent"])
+        recorder.server_received_bytes = server_column(columns[COMMUNICATION_KEY]["server"]["received"])
+        # the phases of the entities which entered none are not kept by the merge
+        phases = columns.get(PHASES_KEY, {})
+        recorder.data_owners_phases = {
+            path: data_owners_column(elapsed, dtype=float) for path, elapsed in phases.get("data-owners", {}).items()
+        }
+        recorder.server_phases = {
+            path: server_column(elapsed, dtype=float) for path, elapsed in phases.get("server", {}).items()
+        }
+        return recorder
+
+    @staticmethod
+    def from_turns(data_by_turn: dict):
+        """Returns the recorder of the turn-by-turn data of a version 2 recording, one map per turn."""
+        turns = sorted(data_by_turn, key=int)
+        M = len(data_by_turn[turns[0]][REWARDS_KEY]["details"]) if turns else 0
+        recorder = TurnRecorder([int(turn) for turn in turns], M)
+        for turn in turns:
+            data = data_by_turn[turn]
+            t = int(turn)
+            recorder.record(
+                t,
+                rewards=data[REWARDS_KEY]["details"],
+                theta_mse=data[THETA_MSE_KEY]["details"],
+                data_owners_times=data[EXECUTION_TIME_KEY]["data-owners"]["details"],
+                server_time=data[EXECUTION_TIME_KEY]["server"]
+            )
+            # the communication and the phases were not recorded by the first version 2 recordings
+            if COMMUNICATION_KEY in data:
+                communication = data[COMMUNICATION_KEY]
+                recorder.record_communication(
+                    t,
+                    data_owners_sent=communication["data-owners"]["sent"],
+                    data_owners_received=communication["data-owners"]["received"],
+                    server_sent=communication["server"]["sent"],
+                    server_received=communication["server"]["received"]
+                )
+            phases = data.get(PHASES_KEY, {})
+            recorder.record_phases(t, phases.get("data-owners", {}), phases.get("server", {}))
+        return recorder
+
+
+def migrate_recording(data: dict) -> dict:
+    """
+    Returns the exported recording of a previous recorder version, its turn-by-turn maps converted into columns.
+    The recordings written in columns under the version 2 are kept as is.
+    """
+    def internal(node):
+        for key, child in node.items():
+            if type(child) != dict: continue
+            if key == TURN_BY_TURN_KEY and REWARDS_KEY not in child:
+                node[key] = TurnRecorder.from_turns(child).export()
+            else:
+                internal(child)
+
+    version = data[RECORDER_VERSION_KEY]
+    if version not in MIGRATED_RECORDER_VERSIONS:
+        raise Exception(f"Illegal Recording version: only read {RECORDER_VERSION}, not {version}")
+    internal(data)
+    data[RECORDER_VERSION_KEY] = RECORDER_VERSION
+    return data
 
 
 class Recording:
@@ -191,19 +579,21 @@ class Recording:
 
     @staticmethod
     def from_file(filename: str):
-        """Creates a new Recording object from a filename, or create a new one if file does not exist."""
-        file = JSONFileWrapper(filename)
+        """
+        Creates a new Recording object from a filename, or create a new one if file does not exist. A columnar
+        recording is read memory-mapped: its series are arrays instead of lists.
+        """
+        file = file_wrapper(filename)
         if file.exists():
             data = file.read()
 
-            # Recognized Recording object only if they have the same version number
-            version = data[RECORDER_VERSION_KEY]
-            if version != RECORDER_VERSION:
-                raise Exception(f"Illegal Recording version: only read {RECORDER_VERSION}, not {version}")
+            # Recognized Recording object only if they have the same version number, or a migrated one
+            if data[RECORDER_VERSION_KEY] != RECORDER_VERSION:
+                data = migrate_recording(data)
 
             return Recording(
                 version=data[RECORDER_VERSION_KEY],
-                root=RecursiveMap(root=data),
+                root=FlatRecursiveMap(root=data),
                 filename=filename,
             )
         else:
@@ -214,7 +604,7 @@ class Recording:
         recording = Recording(
             filename=filename,
             version=RECORDER_VERSION,
-            root=RecursiveMap({
+            root=FlatRecursiveMap({
                 RECORDER_VERSION_KEY: RECORDER_VERSION,
                 RECORDER_DATA_KEY: {}
             })
@@ -231,10 +621,10 @@ class Recording:
             for key in map.keys()
         ])
 
-    def __init__(self, version, root: RecursiveMap, filename=None) -> None:
+    def __init__(self, version, root: FlatRecursiveMap, filename=None) -> None:
         self.version = version
         self.filename = filename
-        self.root: RecursiveMap = root
+        self.root: FlatRecursiveMap = root
 
     def debug_structure(self):
         return self.root.tree_of_keys()
@@ -298,28 +688,29 @@ class Recording:
             return recording[[algorithm, algorithm_version, iteration]]
         raise Exception("Recording not found !")
 
-    def get_rewards_by_turn(self, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+    def get_turn_recorder(self, algorithm, algorithm_version) -> TurnRecorder:
+        """Returns the turn-by-turn recorder of a (merged) algorithm version."""
+        return TurnRecorder.from_export(self.root.get([algorithm, algorithm_version, TURN_BY_TURN_KEY]).export())
+
+    def get_recorded_turns(self, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+        """Returns the turns at which the turn-by-turn data has been recorded."""
         algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
-        return [
-            sum(data_by_turn.get([ REWARDS_KEY, "details"]))
-            for (turn, data_by_turn) in self.root.get([
-                algorithm,
-                algorithm_version,
-                TURN_BY_TURN_KEY
-            ]).items()
-        ]
+        return self.get_turn_recorder(algorithm, algorithm_version).turns
 
-    def get_time_by_turn(self, configuration: Configuration):
-        turns = []
-        times = []
+    def get_recording_schedule(self, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+        """Returns the recording schedule used to record the turn-by-turn data, every turn by default."""
+        algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
+        return self.root.get([algorithm, algorithm_version, RECORDING_SCHEDULE_KEY], default=DEFAULT_RECORDING_SCHEDULE)
 
-        for (turn, data_by_turn) in self.root.get([configuration.algorithm,configuration.algorithm_version,TURN_BY_TURN_KEY]).items():
-            turns.append(turn)
-            times.append( data_by_turn.get([EXECUTION_TIME_KEY, "sum"]) )
+    def get_rewards_by_turn(self, algorithm : str, algorithm_security : str, algorithm_synchronization : str ):
+        algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
+        return self.get_turn_recorder(algorithm, algorithm_version).rewards_sum().tolist()
 
+    def get_time_by_turn(self, configuration: Configuration):
+        recorder = self.get_turn_recorder(configuration.algorithm, configuration.algorithm_version)
         return {
-            "turns": turns,
-            "times": times,
+            "turns": recorder.turns,
+            "times": recorder.times_sum().tolist(),
         }
 
 
@@ -329,16 +720,10 @@ class Recording:
         res = {}
         for algorithm_synchronization in SYNC_VERSIONS:
             algorithm_version = self.get_algorithm_version(algorithm_security, algorithm_synchronization)
-            turns = []
-            theta_mse = []
-
-            for (turn, data_by_turn) in self.root.get([ algorithm, algorithm_version, TURN_BY_TURN_KEY]).items():
-                turns.append(turn)
-                theta_mse.append( data_by_turn.get([THETA_MSE_KEY, "details"]) | mean )
-
+            recorder = self.get_turn_recorder(algorithm, algorithm_version)
             res[algorithm_synchronization] = {
-                "turns": turns,
-                "theta_mse": theta_mse
+                "turns": recorder.turns,
+                "theta_mse": recorder.theta_mse_mean().tolist()
             }
         return res
 
@@ -481,29 +866,58 @@ class Recording:
         ]
         return res
 
+    def get_phase_time_by_entity(self, algorithm: str, algorithm_security: str, algorithm_synchronization: str):
+        """Returns the time spent by each entity in each of its top-level phases, the remaining time being other."""
+        algorithm_version = self.get_algorithm_version(algorithm_security, algorithm_synchronization)
+        entities = list(self.root.get([algorithm, algorithm_version, ENTITIES_KEY]).export().keys())
+        phases_by_entity = []
+        for entity in entities:
+            # the entities which entered no phase (no synchronization, recordings migrated from v2) have none kept
+            phases_keys = [algorithm, algorithm_version, ENTITIES_KEY, entity, PHASES_KEY]
+            phases = self.root.get(phases_keys).export() if self.root.has(phases_keys) else {}
+            # nested phases are already accounted in their top-level phase
+            phases = {path: elapsed for path, elapsed in phases.items() if "/" not in path}
+            phases["other"] = self.root.get([algorithm, algorithm_version, ENTITIES_KEY, entity, EXECUTION_TIME_KEY]) - sum(phases.values())
+            phases_by_entity.append(phases)
+
+        names = sorted(set([name for phases in phases_by_entity for name in phases if name != "other"])) + ["other"]
+        return {
+            "entities": [
+                "Server" if entity == "server" else "DO " + str( int(entity.replace("data-owner-", "")) + 1 )
+                for entity in entities
+            ],
+            "phases": names,
+            "times": {
+                name: [phases.get(name, 0) for phases in phases_by_entity]
+                for name in names
+            }
+        }
+
     def get_cumulative_time_by_sync(self, algorithm: str, algorithm_security: str):
         res = {}
         for algorithm_synchronization in SYNC_VERSIONS:
-            turns = []
-            times = []
-
             algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
-            for (turn, data_by_turn) in self.root.get([algorithm, algorithm_version, TURN_BY_TURN_KEY]).items():
-                turns.append(turn)
-                times.append(data_by_turn.get([EXECUTION_TIME_KEY, "sum"]))
+            recorder = self.get_turn_recorder(algorithm, algorithm_version)
+            res[algorithm_synchronization] = {
+                "turns": recorder.turns,
+                "times": recorder.times_sum().tolist(),
+            }
+        return res
 
+    def get_cumulative_communication_by_sync(self, algorithm: str, algorithm_security: str):
+        res = {}
+        for algorithm_synchronization in SYNC_VERSIONS:
+            algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
+            recorder = self.get_turn_recorder(algorithm, algorithm_version)
             res[algorithm_synchronization] = {
-                "turns": turns,
-                "times": times,
+                "turns": recorder.turns,
+                "bytes": recorder.communication_sum().tolist(),
             }
         return res
 
     def get_theta_mse_by_turn(self, algorithm, algorithm_security, algorithm_synchronization):
         algorithm_version = self.get_algorithm_version( algorithm_security, algorithm_synchronization )
-        return [
-            sum(data_by_turn.get([THETA_MSE_KEY, "details"]))
-            for (turn, data_by_turn) in self.root.get([algorithm, algorithm_version, TURN_BY_TURN_KEY]).items()
-        ]
+        return self.get_turn_recorder(algorithm, algorithm_version).theta_mse_sum().tolist()
 
     def add_data_recording(self, data: DataWrapper):
         key = [RECORDER_DATA_KEY, DATA_KEY]
@@ -513,19 +927,32 @@ class Recording:
             value=value
         )
 
-    def add_entity_recording(self, algorithm, algorithm_version, iteration, entity, execution_time, reward=None):
+    def add_entity_recording(self, algorithm, algorithm_version, iteration, entity, execution_time, reward=None,
+                             sent_bytes=None, received_bytes=None, phases=None):
         """Put data from a single entity"""
         key = [algorithm, algorithm_version, f"it-{iteration}", ENTITIES_KEY, entity]
         value = {EXECUTION_TIME_KEY: execution_time}
         if (reward): value[REWARDS_KEY] = reward
+        if sent_bytes is not None: value[SENT_BYTES_KEY] = sent_bytes
+        if received_bytes is not None: value[RECEIVED_BYTES_KEY] = received_bytes
+        if phases: value[PHASES_KEY] = phases
         self.root.put(
             keys=key,
             value=value
         )
 
-    def add_turn_by_turn_recording(self, algorithm, algorithm_version, iteration, turn_by_turn_data: RecursiveMap):
-        key = [algorithm, algorithm_version, f"it-{iteration}", TURN_BY_TURN_KEY]
-        self.root[key] = turn_by_turn_data.export()
+    def add_turn_by_turn_recording(self, algorithm, algorithm_version, iteration, turn_by_turn_data: TurnRecorder):
+        key = [algorithm, algorithm_version, f"it-{iteration}"]
+        self.root[key + [TURN_BY_TURN_KEY]] = turn_by_turn_data.export()
+        if turn_by_turn_data.schedule is not None:
+            self.root[key + [RECORDING_SCHEDULE_KEY]] = str(turn_by_turn_data.schedule)
+
+    def add_iteration_recording(self, algorithm, algorithm_version, iteration, iteration_recording: dict):
+        """Put the whole recording of an iteration, e.g. recorded by another process."""
+        self.root.put(
+            keys=[algorithm, algorithm_version, f"it-{iteration}"],
+            value=iteration_recording
+        )
 
     def add_execution_configuration(self, execution_config: ExecutionConfiguration):
         """Put contextual data such as the number of iteration"""
@@ -542,25 +969,74 @@ class Recording:
             keys=[algorithm, algorithm_version, f"it-{iteration}"],
             value={
                 SEED_KEY: execution_config.seed,
+                REWARD_SEED_KEY: execution_config.seed,
+                ENGINE_KEY: execution_config.engine,
+                ARM_SCORING_KEY: execution_config.arm_scoring,
+                INVERSE_UPDATE_KEY: { "mode": execution_config.inverse_update },
                 EXECUTION_TIME_KEY: execution_time,
                 REWARDS_KEY: rewards,
             }
         )
 
+    def add_inverse_recording(self, algorithm, algorithm_version, iteration, nb_low_rank_updates, nb_reinversions,
+                              max_drift, nb_fallback_reinversions, max_fallback_drift):
+        """
+        Put the number of low-rank updates of the incrementally maintained inverses, and their drift measured at each
+        periodic re-inversion and at each re-inversion falling back from a too high-rank update.
+        """
+        key = [algorithm, algorithm_version, f"it-{iteration}", INVERSE_UPDATE_KEY]
+        self.root.put(keys=key + [NB_LOW_RANK_UPDATES_KEY], value=nb_low_rank_updates)
+        self.root.put(keys=key + [NB_REINVERSIONS_KEY], value=nb_reinversions)
+        self.root.put(keys=key + [MAX_DRIFT_KEY], value=max_drift)
+        self.root.put(keys=key + [NB_FALLBACK_REINVERSIONS_KEY], value=nb_fallback_reinversions)
+        self.root.put(keys=key + [MAX_FALLBACK_DRIFT_KEY], value=max_fallback_drift)
+
+    def add_synchronization_recording(self, algorithm, algorithm_version, iteration, nb_synchronizations):
+        """Put the number of synchronizations performed during a run."""
+        self.root.put(
+            keys=[algorithm, algorithm_version, f"it-{iteration}", NB_SYNCHRONIZATIONS_KEY],
+            value=nb_synchronizations
+        )
+
+    def add_security_recording(self, algorithm, algorithm_version, iteration, statistics: dict):
+        """Put the statistics collected by the security policy, if any."""
+        if not statistics: return
+        self.root.put(
+            keys=[algorithm, algorithm_version, f"it-{iteration}", SECURITY_KEY],
+            value=statistics
+        )
+
+    def add_simulation_recording(self, algorithm, algorithm_version, iteration, simulated_time,
+                                 simulated_computation_time, communication_time, latency, bandwidth):
+        """Put the end-to-end simulated time of a run, next to its execution time, and the simulated network."""
+        key = [algorithm, algorithm_version, f"it-{iteration}"]
+        self.root.put(keys=key + [SIMULATED_TIME_KEY], value=simulated_time)
+        self.root.put(
+            keys=key + [SIMULATION_KEY],
+            value={
+                "computation-time": simulated_computation_time,
+                "exposed-communication-time": simulated_time - simulated_computation_time,
+                "communication-time": communication_time,
+                "latency": latency,
+                "bandwidth": bandwidth,
+            }
+        )
+
     def contains_entry(self, algorithm, algorithm_version, iteration):
         return self.root.has(keys=[algorithm, algorithm_version, f"it-{iteration}"])
 
     def export(self, filename=None):
-        """Exports the recording object in a json file."""
+        """Exports the recording object in a json file, or in a columnar directory depending on the filename."""
         assert filename is not None or self.filename is not None
         if filename is None: filename = self.filename
-        file = JSONFileWrapper(filename)
+        file = file_wrapper(filename)
         file.write(self.root.export())
 
 
     def merge_and_export(self, filename=None):
         if filename is None: filename = self.filename
-        result = RecursiveMap( root=deepcopy(self.root.export()) )
+        # the merged versions are put in a new tree sharing the other entries, the recording being left unchanged
+        result = RecursiveMap( root=self.root.export() )
 
         # yeild iterations for each algorithm version
         for algorithm_version, algorithm_version_iterations in self.root.get(["linucb"]).items():
@@ -572,9 +1048,96 @@ class Recording:
                 list_maps=iterations,
                 merge_strategy='mean'
             )
-            result.put([ "linucb", algorithm_version ],  merged_iterations.export() )
+            result.put([ "linucb", algorithm_version ], merged_iterations.export() )
 
         assert filename is not None or self.filename is not None
         if filename is None: filename = self.filename
-        file = JSONFileWrapper(filename)
+        file = file_wrapper(filename)
         file.write(result.export())
+
+
+def file_signature(filename):
+    """
+    Returns the inode, the modification time and the size of a recording file, the inode of the header, the latest
+    modification time and the total size of the files for a columnar directory, or None if the file does not exist.
+    The recordings, or the header of a columnar directory, being written aside then renamed, a rewritten recording
+    has a new inode even when its size and its modification time, up to the resolution of the file system, are
+    unchanged.
+    """
+    if not os.path.exists(filename): return None
+    if not os.path.isdir(filename):
+        status = os.stat(filename)
+        return (status.st_ino, status.st_mtime_ns, status.st_size)
+    statuses = [os.stat(filename)] + [
+        os.stat(os.path.join(directory, name)) for directory, _, names in os.walk(filename) for name in names
+    ]
+    return (
+        os.stat(os.path.join(filename, COLUMNAR_HEADER_FILENAME)).st_ino,
+        max([status.st_mtime_ns for status in statuses]),
+        sum([status.st_size for status in statuses])
+    )
+
+
+class RecordingCache:
+    """
+    Bounded LRU cache of the recordings read from files, by filename, shared by the threads of the process. An entry
+    is invalidated when the signature of its file, i.e. its inode, modification time or size, changes. The least
+    recently used entries are evicted beyond max_entries entries or beyond max_bytes bytes, approximated by the size
+    of the files. The cached recordings are shared, hence must not be modified.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=1 << 30) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (signature, recording) by filename, from the least to the most recently used
+        self.entries = OrderedDict()
+        self.nb_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, filename) -> Recording:
+        """Returns the recording of the file, read from the file only if not cached or modified since."""
+        signature = file_signature(filename)
+        with self.lock:
+            entry = self.entries.get(filename)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(filename)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self.invalidations += 1
+                self.remove(filename)
+            self.misses += 1
+
+        # the file is read outside of the lock, such that the other recordings are still served meanwhile
+        recording = Recording.from_file(filename)
+        if signature is None: return recording
+
+        with self.lock:
+            if filename in self.entries: self.remove(filename)
+            self.entries[filename] = (signature, recording)
+            self.nb_bytes += signature[-1]
+            while len(self.entries) > self.max_entries or (self.nb_bytes > self.max_bytes and len(self.entries) > 1):
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+        return recording
+
+    def remove(self, filename):
+        signature, _ = self.entries.pop(filename)
+        self.nb_bytes -= signature[-1]
+
+    def statistics(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.nb_bytes,
+                "max-entries": self.max_entries,
+                "max-bytes": self.max_bytes,
+            }
@@ -1,46 +1,96 @@
+from numbers import Real
+import numpy
+
 
-def iterable( object ):
-  try:
-    iter(object)
-    return True
-  except:
-    return False
-    
 class Tensor:
-  """Tensor represents a tensor object."""
+  """
+  Tensor represents a tensor object, backed by a numpy array: a float array for plaintext data, an integer array
+  for fixed-point encoded data and an object array for encrypted items (e.g. EncryptedNumber).
+  """
   def __init__(self, encrypted_tensor) -> None:
-    self.__encrypted_tensor = encrypted_tensor
+    array = numpy.asarray(encrypted_tensor)
+    if array.dtype.kind == "O" and array.size != 0 and all(isinstance(item, Real) for item in array.flat):
+      # items computed one by one by map are numbers stored in an object array
+      array = numpy.asarray(array.tolist())
+    self.__encrypted_tensor = array
 
   def __iter__(self):
-    return iter(self.__encrypted_tensor)
+    return iter(self.data())
+
+  def data(self):
+    """Returns the tensor as nested lists."""
+    return self.__encrypted_tensor.tolist()
+
+  def numpy(self) -> numpy.ndarray:
+    """Returns the array backing the tensor."""
+    return self.__encrypted_tensor
+
+  @property
+  def shape(self): return self.__encrypted_tensor.shape
 
-  def data(self): return self.__encrypted_tensor
-  
   def __add__(self, other_tensor ):
     """Returns the sum of self and argument provided tensors."""
-    def nested_add( left, right ):
-      if iterable(left) and iterable(right):
-        return [
-          nested_add( left_item, right_item )
-          for left_item, right_item in zip(left, right)
-        ]
-      else:
-        if type(left) == type(right):
-          return left + right
-        else:
-          raise Exception(f"Incomptible type: {type(left)} and {type(right)}")
-    return Tensor(nested_add( self, other_tensor ))
-
-  def map(self, function ):
-    def nested_map( object):
-      if iterable(object) :
-        return [
-          nested_map(item)
-          for item in object
-        ]
-      else:
-        return function(object)
-    return Tensor(nested_map( self ))
+    left, right = self.numpy(), other_tensor.numpy()
+    if left.shape != right.shape:
+      raise Exception(f"Incompatible shapes: {left.shape} and {right.shape}")
+    if (left.dtype.kind == "O") != (right.dtype.kind == "O"):
+      raise Exception(f"Incompatible type: {left.dtype} and {right.dtype}")
+    # the addition of object arrays calls the __add__ of the items, e.g. the homomorphic addition
+    return Tensor(left + right)
+
+  def map(self, function, vectorized = False ):
+    """
+    Returns the tensor whose items are the images of the items by the function. A vectorized function is applied
+    once on the whole array.
+    """
+    if vectorized:
+      return Tensor(function(self.numpy()))
+    return Tensor(numpy.frompyfunc(function, 1, 1)(self.numpy()))
 
   def __str__(self) -> str:
-      return str(self.__encrypted_tensor)
+      return str(self.data())
+
+
+class FixedPointCodec:
+  """
+  Fixed-point codec mapping float arrays to integer residues modulo 2^value_bits, such that the sum of the
+  residues of M arrays is the residue of the sum of the M arrays. Residues are uint64 when value_bits is 64,
+  big integers otherwise.
+  """
+  def __init__(self, M, precision_bits = 32, value_bits = 64) -> None:
+    self.M = M
+    self.precision_bits = precision_bits
+    self.value_bits = value_bits
+    self.scale = 1 << precision_bits
+    self.modulus = 1 << value_bits
+    # the magnitude of an encoded entry is bounded such that the sum of M entries does not overflow
+    self.bound = (1 << (value_bits - 1)) // M
+    # the carries of a sum of M residues, required when residues are packed side by side
+    self.headroom_bits = M.bit_length()
+
+  def is_native(self) -> bool:
+    return self.value_bits == 64
+
+  def encode(self, array: numpy.ndarray) -> numpy.ndarray:
+    """Returns the residues of the fixed-point encoding of the array."""
+    integers = numpy.rint(numpy.asarray(array, dtype=float) * self.scale)
+    if integers.size != 0 and numpy.abs(integers).max() >= self.bound:
+      raise Exception(f"Fixed-point overflow: the entries must be lower than {self.bound / self.scale} in magnitude")
+    if self.is_native():
+      # the two's complement of int64 is the residue modulo 2^64
+      return integers.astype(numpy.int64).view(numpy.uint64)
+    return numpy.array([int(integer) % self.modulus for integer in integers.flat], dtype=object).reshape(integers.shape)
+
+  def residue(self, value: int):
+    """Returns the residue of an integer, e.g. a mask, in the representation of the encoded arrays."""
+    if self.is_native(): return numpy.uint64(value % self.modulus)
+    return value % self.modulus
+
+  def decode(self, residues) -> numpy.ndarray:
+    """Returns the float array encoded by the residues, which may hold sums of up to M encoded arrays."""
+    residues = numpy.asarray(residues)
+    if residues.dtype == numpy.uint64 and self.is_native():
+      return residues.view(numpy.int64) / self.scale
+    residues = residues.astype(object) % self.modulus
+    signed = numpy.where(residues >= self.modulus // 2, residues - self.modulus, residues)
+    return numpy.asarray(signed, dtype=float) / self.scale
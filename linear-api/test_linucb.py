@@ -0,0 +1,581 @@
+import os
+import random
+
+import numpy
+
+from data import DataWrapper, generate_data_for_all_dataowner
+from execution_config import ExecutionConfiguration, INVERSE_DIRECT, INVERSE_INCREMENTAL, ENGINE_NAIVE, ENGINE_BATCHED, \
+    ENGINE_ASYNC, ARM_SCORING_LOOP, ARM_SCORING_VECTORIZED
+from file import ColumnarFileWrapper, COLUMNAR_HEADER_FILENAME
+from linucb import IncrementalInverse, PairwiseMaskedAdditionSecurityPolicy, TreeAggregationSecurityPolicy, \
+    PackedPaillierSecurityPolicy, PlaintextSecurityPolicy, MaskedAdditionSecurityPolicy, \
+    NumpyMaskedAdditionSecurityPolicy, MaskedTreeAggregationSecurityPolicy, payload_size, DataOwnerContext, Timer, \
+    woodbury_update, launch_linucb, LINUCB_ALGORITHM, PLAINTEXT_VERSION, MASKED_VERSION, PAIRWISE_MASKED_VERSION, \
+    EACH_STEPS_SYNC, TWO_STEPS_SYNC, NO_SYNC, ADAPTIVE_SYNC, PaillierKeyPool, PaillierKeyManager, \
+    generate_paillier_primes, write_paillier_key, read_paillier_key, loop_arm_scores, vectorized_arm_scores, \
+    CounterBasedRandomGenerator, RewardNoise, AdaptiveSynchronization
+from main import create_parser
+from recording import Recording, RecordingCache, RecursiveMap, TurnRecorder, FlatRecursiveMap, file_signature, \
+    merge_recursive_maps, migrate_recording, RECORDER_VERSION, RECORDER_VERSION_KEY, TURN_BY_TURN_KEY, REWARDS_KEY, \
+    THETA_MSE_KEY, EXECUTION_TIME_KEY, INVERSE_UPDATE_KEY, NB_LOW_RANK_UPDATES_KEY, NB_FALLBACK_REINVERSIONS_KEY, \
+    MAX_DRIFT_KEY, PHASES_KEY, ENTITIES_KEY, NB_SYNCHRONIZATIONS_KEY
+from tensor import FixedPointCodec
+
+
+def random_symmetric_matrix(d, generator):
+    X = generator.random((d, d))
+    return X.T.dot(X)
+
+
+def new_data(d, K, N, M):
+    random.seed(5)
+    return DataWrapper(
+        d=d, K=K, N=N, M=M, theta=DataWrapper.generate_theta(d), gamma=0.01, delta=0.001, R=0.01,
+        X=generate_data_for_all_dataowner(M, K, d)
+    )
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Reward noise
+# ----------------------------------------------------------------------------------------------------------------------
+def test_counter_based_values_only_depend_on_the_seed_and_the_counter():
+    counters = numpy.arange(1000, dtype=numpy.uint64)
+    generator = CounterBasedRandomGenerator(seed=3)
+    bits = generator.bits(counters)
+    assert (CounterBasedRandomGenerator(seed=3).bits(counters[::-1]) == bits[::-1]).all()
+    assert [int(generator.bits(counter)) for counter in counters[:10]] == bits[:10].tolist()
+    assert len(set(bits.tolist())) == 1000
+    assert not (CounterBasedRandomGenerator(seed=4).bits(counters) == bits).any()
+
+    values = generator.uniform(-0.5, 0.5, counters)
+    assert values.min() >= -0.5 and values.max() < 0.5 and abs(values.mean()) < 0.05
+
+
+def test_reward_noise_of_a_data_owner_does_not_depend_on_the_others():
+    noise = RewardNoise(seed=0, R=0.01, N=50, M=3)
+    assert noise.block.shape == (51, 3) and numpy.abs(noise.block).max() <= 0.01
+    assert noise.value(2, 7) == noise.turn(7)[2] == noise.generate(7, 2)
+
+    # the noise of a (data owner, turn) is the same whatever the number of data owners and of turns
+    assert (RewardNoise(seed=0, R=0.01, N=80, M=5).block[:51, :3] == noise.block).all()
+    assert not (RewardNoise(seed=1, R=0.01, N=50, M=3).block == noise.block).any()
+
+    # the engines drawing the noise in distinct orders pull the same rewards
+    data = new_data(d=4, K=5, N=15, M=3)
+    rewards = [run_engine(data, engine, PLAINTEXT_VERSION)[0] for engine in [ENGINE_NAIVE, ENGINE_BATCHED, ENGINE_ASYNC]]
+    assert numpy.allclose(rewards[1:], rewards[0], rtol=1e-12)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Adaptive synchronization
+# ----------------------------------------------------------------------------------------------------------------------
+def test_adaptive_synchronization_follows_the_determinant_ratio():
+    synchronization_policy = AdaptiveSynchronization(threshold=2.0, gamma=1.0)
+    data_owners = new_data_owners(2)
+    for data_owner in data_owners:
+        data_owner.A, data_owner.increase_A = numpy.zeros((3, 3)), numpy.zeros((3, 3))
+
+    # with A = 0 and gamma = 1, the determinant ratio of an increase c I is (1 + c)^3
+    data_owners[1].increase_A = 0.25 * numpy.identity(3)
+    assert not synchronization_policy.requiredSynchronize(2, data_owners)
+    data_owners[1].increase_A = 0.26 * numpy.identity(3)
+    assert synchronization_policy.requiredSynchronize(3, data_owners)
+
+    # the references are taken again once A includes the synchronized increases
+    for data_owner in data_owners:
+        data_owner.A, data_owner.increase_A = data_owner.A + data_owners[1].increase_A, numpy.zeros((3, 3))
+    data_owners[0].increase_A = 0.26 * numpy.identity(3)
+    assert not synchronization_policy.requiredSynchronize(4, data_owners)
+    data_owners[0].increase_A = 0.33 * numpy.identity(3)
+    assert synchronization_policy.requiredSynchronize(5, data_owners)
+
+
+def test_adaptive_synchronization_synchronizes_less_with_a_higher_threshold():
+    data = new_data(d=4, K=5, N=40, M=3)
+    nb_synchronizations = [
+        run_engine(data, ENGINE_NAIVE, PLAINTEXT_VERSION, ADAPTIVE_SYNC, sync_threshold=threshold)[1]
+        .get([NB_SYNCHRONIZATIONS_KEY])
+        for threshold in [1.01, 1.5, 4.0, 1e12]
+    ]
+    assert nb_synchronizations[0] == data.N - 2
+    assert nb_synchronizations == sorted(nb_synchronizations, reverse=True) and nb_synchronizations[-1] == 0
+    assert 0 < nb_synchronizations[2] < nb_synchronizations[1] < data.N - 2
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Arm scoring
+# ----------------------------------------------------------------------------------------------------------------------
+def test_vectorized_scoring_selects_the_arms_of_the_loop_scoring():
+    generator = numpy.random.default_rng(0)
+    for _ in range(200):
+        # the arms are duplicated such that they tie, the first of them being selected by both scorings
+        arms = generator.random((6, 5))
+        x = numpy.concatenate([arms, arms[::-1]])
+        inv = numpy.linalg.inv(random_symmetric_matrix(5, generator) + numpy.identity(5))
+        O, exploration_term = generator.standard_normal(5), generator.random()
+        loop_scores = loop_arm_scores(x, O, inv, exploration_term)
+        vectorized_scores = vectorized_arm_scores(x, O, inv, exploration_term)
+        assert numpy.allclose(loop_scores, vectorized_scores, rtol=1e-12)
+        assert numpy.argmax(loop_scores) == numpy.argmax(vectorized_scores) < 6
+
+    # over a seeded run, the arms pulled give the same rewards
+    data = new_data(d=4, K=5, N=30, M=3)
+    data.X = [arms + arms[::-1] for arms in data.X]
+    data.K = 10
+    rewards = {}
+    for arm_scoring in [ARM_SCORING_LOOP, ARM_SCORING_VECTORIZED]:
+        execution_config = ExecutionConfiguration(
+            LINUCB_ALGORITHM, PLAINTEXT_VERSION, TWO_STEPS_SYNC, 1, 0, 0, arm_scoring=arm_scoring
+        )
+        rewards[arm_scoring] = launch_linucb(data, Recording.new(filename=None), execution_config)
+    assert rewards[ARM_SCORING_LOOP] == rewards[ARM_SCORING_VECTORIZED]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Incremental inverse
+# ----------------------------------------------------------------------------------------------------------------------
+def test_woodbury_updates_stay_close_to_the_direct_inverse():
+    generator = numpy.random.default_rng(0)
+    A = random_symmetric_matrix(12, generator)
+    inv = numpy.linalg.inv(A + numpy.identity(12))
+    for rank in [1, 2, 3, 5] * 25:
+        U = generator.random((rank, 12))
+        A += U.T.dot(U)
+        inv = woodbury_update(inv, U)
+    direct = numpy.linalg.inv(A + numpy.identity(12))
+    assert numpy.abs(inv - direct).max() / numpy.abs(direct).max() < 1e-8
+
+
+def test_incremental_inverse_counts_the_fallback_reinversions():
+    generator = numpy.random.default_rng(1)
+    A = random_symmetric_matrix(8, generator)
+    inverse = IncrementalInverse(A, gamma=0.5, reinversion_period=1000)
+    assert inverse.max_rank == 4
+    for rank in [1, 4, 5, None, 2]:
+        U = generator.random((rank if rank else 8, 8))
+        A += U.T.dot(U)
+        inverse.update(A, U if rank else None)
+        assert numpy.allclose(inverse.inv, numpy.linalg.inv(A + 0.5 * numpy.identity(8)))
+    assert inverse.nb_low_rank_updates == 3
+    assert inverse.nb_fallback_reinversions == 2
+    assert inverse.nb_reinversions == 0
+    # only the fallback following low-rank updates has a drift to measure
+    assert len(inverse.fallback_drifts) == 1 and inverse.fallback_drifts[0] < 1e-8
+
+
+def test_each_step_synchronization_keeps_low_rank_updates():
+    data = new_data(d=12, K=40, N=60, M=5)
+    rewards = {}
+    for inverse_update in [INVERSE_DIRECT, INVERSE_INCREMENTAL]:
+        recording = Recording.new(filename=None)
+        execution_config = ExecutionConfiguration(
+            LINUCB_ALGORITHM, PLAINTEXT_VERSION, EACH_STEPS_SYNC, 1, 0, 0, inverse_update=inverse_update,
+            reinversion_period=20
+        )
+        rewards[inverse_update] = launch_linucb(data, recording, execution_config)
+    statistics = recording.root.get([LINUCB_ALGORITHM, execution_config.algorithm_version, "it-0", INVERSE_UPDATE_KEY])
+    assert statistics.get([NB_FALLBACK_REINVERSIONS_KEY]) == 0
+    assert statistics.get([NB_LOW_RANK_UPDATES_KEY]) > 0
+    assert statistics.get([MAX_DRIFT_KEY]) < 1e-8
+    assert abs(rewards[INVERSE_DIRECT] - rewards[INVERSE_INCREMENTAL]) < 1e-6 * abs(rewards[INVERSE_DIRECT])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Fixed-point codec
+# ----------------------------------------------------------------------------------------------------------------------
+def test_fixed_point_codec_round_trips_negative_and_large_values():
+    for value_bits in [64, 128]:
+        codec = FixedPointCodec(M=4, value_bits=value_bits)
+        largest = 0.99 * codec.bound / codec.scale
+        array = numpy.array([[-largest, -1234.5678, -2 ** -20], [0.0, 0.5, largest]])
+        assert numpy.abs(codec.decode(codec.encode(array)) - array).max() <= 0.5 / codec.scale
+
+        # the sum of the residues of M arrays decodes to the sum of the arrays, negative and large entries included
+        arrays = [array / 4, -array / 4, array / 4, array / 4]
+        residues = sum([codec.encode(array) for array in arrays])
+        assert numpy.allclose(codec.decode(residues), sum(arrays), rtol=1e-12, atol=2 / codec.scale)
+
+
+def test_fixed_point_codec_rejects_overflowing_values():
+    codec = FixedPointCodec(M=4)
+    try:
+        codec.encode(numpy.array([codec.bound / codec.scale]))
+    except Exception as exception:
+        assert "overflow" in str(exception)
+    else:
+        assert False, "the overflow is not detected"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Security policies
+# ----------------------------------------------------------------------------------------------------------------------
+def new_data_owners(M):
+    data_owners = [DataOwnerContext() for _ in range(M)]
+    for data_owner_index, data_owner in enumerate(data_owners):
+        data_owner.index = data_owner_index
+        data_owner.timer = Timer()
+    return data_owners
+
+
+def test_pairwise_masks_sum_to_zero_across_data_owners():
+    M = 4
+    security_policy = PairwiseMaskedAdditionSecurityPolicy(M)
+    data_owners = new_data_owners(M)
+    security_policy.init(Timer(), data_owners)
+
+    masks_by_turn = {}
+    for t in [2, 3]:
+        for data_owner in data_owners:
+            security_policy.time_step_begin(t, data_owner)
+        masks_by_turn[t] = [security_policy.mask(data_owner_index, (3, 3)) for data_owner_index in range(M)]
+        assert not sum(masks_by_turn[t]).any()
+        assert sum([security_policy.mask(data_owner_index, (3,)) for data_owner_index in range(M)]).tolist() == [0] * 3
+        # the mask of a single data owner hides its residues
+        assert masks_by_turn[t][0].all()
+    # the masks are drawn again at each turn, and differ between A and b
+    assert (masks_by_turn[2][0] != masks_by_turn[3][0]).all()
+    assert (masks_by_turn[3][0][0] != security_policy.mask(0, (3,))).all()
+
+
+
+def test_packed_paillier_aggregates_as_the_plaintext(tmp_path, monkeypatch):
+    monkeypatch.setattr(PaillierKeyManager, "pool", PaillierKeyPool(directory=tmp_path))
+    # 7 data owners fill the headroom of the slots, 8 require a bit more of it
+    for M in [7, 8]:
+        security_policy = PackedPaillierSecurityPolicy(M, key_length=512)
+        codec = security_policy.codec
+        assert security_policy.slots >= 2 and M < 1 << codec.headroom_bits
+
+        # the smallest negative entries have the largest residues, whose sum carries the most into the headroom
+        largest = 0.99 * codec.bound / codec.scale
+        increases_A = [numpy.full((3, 3), -1.0 / codec.scale) for _ in range(M)]
+        increases_A[0][0] = [largest, -largest, -1234.5678]
+        increases_b = list(numpy.random.default_rng(M).standard_normal((M, 3)) * 1e3)
+
+        results = {}
+        for name, policy in [("plaintext", PlaintextSecurityPolicy()), ("packed", security_policy)]:
+            data_owners = new_data_owners(M)
+            for data_owner, increase_A, increase_b in zip(data_owners, increases_A, increases_b):
+                data_owner.increase_A, data_owner.increase_b = increase_A.copy(), increase_b.copy()
+            policy.init(Timer(), data_owners)
+            policy.synchronize(Timer(), data_owners)
+            results[name] = data_owners
+        for plaintext, packed in zip(results["plaintext"], results["packed"]):
+            assert numpy.allclose(packed.increase_A, plaintext.increase_A, rtol=1e-12, atol=M / codec.scale)
+            assert numpy.allclose(packed.increase_b, plaintext.increase_b, rtol=1e-12, atol=M / codec.scale)
+        assert results["packed"][0].increase_A[1, 1] == -M / codec.scale
+
+
+def test_traffic_counts_the_frames_delivered_by_the_security_policies(monkeypatch):
+    M = 3
+    for security_policy in [
+        MaskedAdditionSecurityPolicy(M), NumpyMaskedAdditionSecurityPolicy(M), PairwiseMaskedAdditionSecurityPolicy(M),
+        MaskedTreeAggregationSecurityPolicy(M, fan_out=2)
+    ]:
+        # the frames are seen when preprocessed by a data owner, and once delivered when postprocessed by it
+        uploaded, delivered = [0] * M, [0] * M
+        preprocess, postprocess = security_policy.preprocess, security_policy.postprocess
+        def spied_preprocess(data_owner_index, tensor):
+            frame = preprocess(data_owner_index, tensor)
+            uploaded[data_owner_index] += payload_size(frame)
+            return frame
+        def spied_postprocess(data_owner_index, frame):
+            delivered[data_owner_index] += payload_size(frame)
+            return postprocess(data_owner_index, frame)
+        monkeypatch.setattr(security_policy, "preprocess", spied_preprocess)
+        monkeypatch.setattr(security_policy, "postprocess", spied_postprocess)
+
+        data_owners = new_data_owners(M)
+        security_policy.init(Timer(), data_owners)
+        for t in [2, 3]:
+            for data_owner in data_owners:
+                security_policy.time_step_begin(t, data_owner)
+                data_owner.increase_A, data_owner.increase_b = numpy.full((4, 4), float(t)), numpy.full(4, float(t))
+            security_policy.synchronize(Timer(), data_owners)
+        assert data_owners[0].increase_A[0, 0] == 3 * M
+
+        traffic = security_policy.traffic
+        for data_owner_index in range(M):
+            assert traffic.sent_bytes(f"data-owner-{data_owner_index}") == uploaded[data_owner_index]
+            assert traffic.received_bytes(f"data-owner-{data_owner_index}") == delivered[data_owner_index]
+        # a broadcast result is sent once for all the data owners
+        downloaded = delivered[0] if security_policy.broadcast else sum(delivered)
+        statistics = security_policy.statistics()
+        assert (statistics["uploaded-bytes"], statistics["downloaded-bytes"]) == (sum(uploaded), downloaded)
+
+
+def test_tree_aggregation_accounts_the_critical_time_to_the_server():
+    security_policy = TreeAggregationSecurityPolicy(fan_out=3)
+    timer_server = Timer()
+    list_A = [numpy.full((4, 4), float(index)) for index in range(9)]
+    list_b = [numpy.full(4, float(index)) for index in range(9)]
+    A, b = security_policy.aggregate(timer_server, list_A, list_b)
+    assert (A == 36).all() and (b == 36).all()
+
+    statistics = security_policy.statistics()
+    assert [level["aggregators"] for level in statistics["levels"].values()] == [3, 1]
+    assert timer_server.time == timer_server.phases["aggregation"] == statistics["critical-time"]
+    assert statistics["critical-time"] <= sum([level["time"] for level in statistics["levels"].values()])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Paillier keys
+# ----------------------------------------------------------------------------------------------------------------------
+def test_paillier_key_round_trips_through_its_file(tmp_path):
+    filename = tmp_path / "key-2048.key"
+    p, q = 2 ** 521 - 1, 2 ** 127 - 1
+    write_paillier_key(filename, p, q)
+    assert read_paillier_key(filename) == (p, q)
+    assert os.listdir(tmp_path) == ["key-2048.key"]
+
+
+def test_paillier_key_pool_takes_its_spares_then_refills(tmp_path):
+    pool = PaillierKeyPool(directory=tmp_path)
+    spares = [generate_paillier_primes(256) for _ in range(2)]
+    for index, (p, q) in enumerate(spares):
+        write_paillier_key(tmp_path / f"spare-256-0-{index}.key", p, q)
+
+    # each spare is only taken once, and no file is left behind
+    assert [pool.take_spare(256), pool.take_spare(256)] == spares
+    assert pool.take_spare(256) is None and pool.take_spare(512) is None
+    assert os.listdir(tmp_path) == []
+
+    # the pool is refilled in the background up to the requested count
+    pool.prefetch(256, count=2)
+    pool.executor.shutdown(wait=True)
+    assert len(pool.spares(256)) == 2 and pool.pending[256] == []
+    pool.prefetch(256, count=2)
+    assert pool.pending[256] == []
+    for _ in range(3):
+        p, q = pool.take(256)
+        assert (p * q).bit_length() == 256
+    assert pool.spares(256) == []
+
+
+def test_paillier_key_manager_loads_the_key_it_created(tmp_path, monkeypatch):
+    monkeypatch.setattr(PaillierKeyManager, "pool", PaillierKeyPool(directory=tmp_path))
+    pk, sk = PaillierKeyManager.load_or_create("server", n_length=256)
+    loaded_pk, loaded_sk = PaillierKeyManager.load_or_create("server", n_length=256)
+    assert loaded_pk == pk and (loaded_sk.p, loaded_sk.q) == (sk.p, sk.q)
+    assert loaded_sk.decrypt(pk.encrypt(-42)) == -42
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Engines
+# ----------------------------------------------------------------------------------------------------------------------
+def run_engine(data, engine, algorithm_security, algorithm_sync=EACH_STEPS_SYNC, **options):
+    recording = Recording.new(filename=None)
+    execution_config = ExecutionConfiguration(
+        LINUCB_ALGORITHM, algorithm_security, algorithm_sync, 1, 0, 0, engine=engine, **options
+    )
+    rewards = launch_linucb(data, recording, execution_config)
+    return rewards, recording.root.get([LINUCB_ALGORITHM, execution_config.algorithm_version, "it-0"])
+
+
+def test_async_engine_obtains_the_rewards_of_the_naive_engine():
+    data = new_data(d=4, K=5, N=12, M=3)
+    for algorithm_security in [PLAINTEXT_VERSION, MASKED_VERSION, PAIRWISE_MASKED_VERSION]:
+        for algorithm_sync in [EACH_STEPS_SYNC, TWO_STEPS_SYNC]:
+            naive_rewards, _ = run_engine(data, ENGINE_NAIVE, algorithm_security, algorithm_sync)
+            async_rewards, iteration = run_engine(data, ENGINE_ASYNC, algorithm_security, algorithm_sync)
+            assert abs(naive_rewards - async_rewards) < 1e-9 * abs(naive_rewards)
+
+            # the phases are recorded turn by turn, as by the other engines
+            phases = iteration.get([TURN_BY_TURN_KEY, PHASES_KEY]).export()
+            assert len(phases["data-owners"]["postprocess"]) == data.N - 1
+            assert phases["server"]["aggregation"][-1] == iteration.get([ENTITIES_KEY, "server", PHASES_KEY, "aggregation"])
+
+
+
+def test_batched_engine_records_the_turns_of_the_naive_engine():
+    data = new_data(d=4, K=5, N=20, M=4)
+    for algorithm_security in [PLAINTEXT_VERSION, PAIRWISE_MASKED_VERSION]:
+        for algorithm_sync in [NO_SYNC, TWO_STEPS_SYNC, ADAPTIVE_SYNC]:
+            iterations = {}
+            for engine in [ENGINE_NAIVE, ENGINE_BATCHED]:
+                _, iterations[engine] = run_engine(data, engine, algorithm_security, algorithm_sync, sync_threshold=1.5)
+            naive, batched = [
+                TurnRecorder.from_export(iterations[engine].get([TURN_BY_TURN_KEY]).export())
+                for engine in [ENGINE_NAIVE, ENGINE_BATCHED]
+            ]
+            assert naive.turns == batched.turns
+            assert numpy.allclose(naive.rewards, batched.rewards, rtol=1e-12)
+            assert numpy.allclose(naive.theta_mse, batched.theta_mse, rtol=1e-9)
+            assert (naive.data_owners_received_bytes == batched.data_owners_received_bytes).all()
+            nb_synchronizations = [iterations[engine].get([NB_SYNCHRONIZATIONS_KEY]) for engine in iterations]
+            assert nb_synchronizations[0] == nb_synchronizations[1]
+
+    # the arms of all the data owners are only scored at once
+    try:
+        run_engine(data, ENGINE_BATCHED, PLAINTEXT_VERSION, arm_scoring=ARM_SCORING_LOOP)
+    except Exception as exception:
+        assert "vectorized arm scoring" in str(exception)
+    else:
+        assert False, "the loop arm scoring is not rejected"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------------------------------------------------------
+def test_version_2_turn_maps_are_migrated_into_columns():
+    data_by_turn = {
+        str(t): {
+            REWARDS_KEY: { "details": [t, 2 * t], "sum": 3 * t },
+            THETA_MSE_KEY: { "details": [0.5, 0.25], "sum": 0.75 },
+            EXECUTION_TIME_KEY: { "data-owners": { "details": [0.1, 0.2], "sum": 0.3 }, "server": 0.4, "sum": 0.7 },
+        }
+        for t in [1, 2, 3]
+    }
+    data = {
+        RECORDER_VERSION_KEY: "2",
+        LINUCB_ALGORITHM: { "plaintext-version.each-step": { TURN_BY_TURN_KEY: data_by_turn } },
+    }
+    recording = Recording(version=RECORDER_VERSION, root=FlatRecursiveMap(root=migrate_recording(data)))
+    recorder = recording.get_turn_recorder(LINUCB_ALGORITHM, "plaintext-version.each-step")
+    assert recording.root.get([RECORDER_VERSION_KEY]) == RECORDER_VERSION
+    assert recorder.turns == [1, 2, 3]
+    assert recorder.rewards_sum().tolist() == [3, 6, 9]
+    assert recorder.communication_sum().tolist() == [0, 0, 0]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------------------------------------------------
+def run_benchmark(input, output, *options):
+    args = create_parser().parse_args([
+        "benchmark", "--iteration", "1", "--inputs", input, "--output", output, "--without-security",
+        "--syncs", EACH_STEPS_SYNC, *options
+    ])
+    args.func(args)
+    recording = Recording.from_file(f"{output}/fragments/{input}")
+    return recording.get_recorded_turns(LINUCB_ALGORITHM, PLAINTEXT_VERSION, EACH_STEPS_SYNC)
+
+
+def test_resumed_benchmark_runs_again_the_tasks_of_another_configuration(tmp_path, capsys):
+    input, output = str(tmp_path / "input.json"), str(tmp_path / "output")
+    new_data(d=4, K=5, N=30, M=2).export(input)
+
+    assert run_benchmark(input, output) == list(range(1, 30))
+    assert run_benchmark(input, output) == list(range(1, 30))
+    assert "1 tasks already done, 0 remaining" in capsys.readouterr().out
+    assert run_benchmark(input, output, "--recording-schedule", "every:10") == [1, 11, 21, 29]
+    assert "1 checkpoints of another configuration" in capsys.readouterr().out
+
+    # the input changes the result too
+    new_data(d=4, K=5, N=40, M=2).export(input)
+    assert run_benchmark(input, output, "--recording-schedule", "every:10") == [1, 11, 21, 31, 39]
+
+
+def test_phases_breakdown_of_entities_without_phases(tmp_path):
+    input, output = str(tmp_path / "input.json"), str(tmp_path / "output")
+    new_data(d=4, K=5, N=10, M=2).export(input)
+    run_benchmark(input, output, "--syncs", NO_SYNC, EACH_STEPS_SYNC)
+    recording = Recording.from_file(f"{output}/fragments/{input}")
+
+    # without synchronization, the server enters no phase: its time is all other
+    breakdown = recording.get_phase_time_by_entity(LINUCB_ALGORITHM, PLAINTEXT_VERSION, NO_SYNC)
+    assert breakdown["entities"] == ["Server", "DO 1", "DO 2"] and breakdown["phases"][-1] == "other"
+    assert all(breakdown["times"][name][0] == 0 for name in breakdown["phases"][:-1])
+    breakdown = recording.get_phase_time_by_entity(LINUCB_ALGORITHM, PLAINTEXT_VERSION, EACH_STEPS_SYNC)
+    assert len(breakdown["phases"]) > 1 and breakdown["phases"][-1] == "other"
+
+
+def test_turn_recorder_reads_an_empty_or_flat_export():
+    recorder = TurnRecorder.from_export(TurnRecorder([], M=3).export())
+    assert recorder.turns == [] and recorder.rewards_sum().tolist() == [] and recorder.times_sum().tolist() == []
+
+    columns = TurnRecorder([1, 2], M=1).export()
+    columns[REWARDS_KEY] = [1.0, 3.0]
+    recorder = TurnRecorder.from_export(columns)
+    assert recorder.rewards.shape == (2, 1) and recorder.rewards_sum().tolist() == [1.0, 3.0]
+
+
+def test_merged_integers_stay_integers():
+    maps = [
+        RecursiveMap({ "nb": 12, "bytes": [[0, 10], [20, 30]], "rewards": [1.0, 2.0], "odd": [1, 2], "seconds": 1 }),
+        RecursiveMap({ "nb": 12, "bytes": [[0, 20], [40, 50]], "rewards": [3.0, 4.0], "odd": [2, 2], "seconds": 2 }),
+    ]
+    merged = merge_recursive_maps(maps, merge_strategy="mean").export()
+    assert merged == { "nb": 12, "bytes": [[0, 15], [30, 40]], "rewards": [2.0, 3.0], "odd": [1.5, 2.0], "seconds": 1.5 }
+    assert type(merged["nb"]) == int and type(merged["bytes"][0][0]) == int
+
+
+def test_columnar_recording_keeps_small_series_in_its_header(tmp_path):
+    data = { "small": [1, 2, 3], "large": [[float(t)] * 4 for t in range(1000)], "name": "each-step" }
+    ColumnarFileWrapper(str(tmp_path / "recording.columns")).write(data)
+    assert sorted(os.listdir(tmp_path / "recording.columns")) == ["columns-1", COLUMNAR_HEADER_FILENAME]
+    assert os.listdir(tmp_path / "recording.columns" / "columns-1") == ["0.npy"]
+    read_data = ColumnarFileWrapper(str(tmp_path / "recording.columns")).read()
+    assert read_data["small"] == [1, 2, 3] and read_data["name"] == "each-step"
+    assert read_data["large"].tolist() == data["large"]
+
+
+def test_columnar_recording_survives_a_failed_write(tmp_path, monkeypatch):
+    filename = str(tmp_path / "recording.columns")
+    data = { "large": list(range(1000)), "name": "each-step" }
+    ColumnarFileWrapper(filename).write(data)
+
+    # a crash before the header is swapped leaves the previous version
+    def failing_replace(source, destination): raise OSError("crash")
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "replace", failing_replace)
+        try:
+            ColumnarFileWrapper(filename).write({ "large": list(range(2000)), "name": "two-steps" })
+        except OSError:
+            pass
+        else:
+            assert False, "the write does not fail"
+    read_data = ColumnarFileWrapper(filename).read()
+    assert read_data["name"] == "each-step" and read_data["large"].tolist() == data["large"]
+
+    # the next write removes the leftovers of the failed one
+    ColumnarFileWrapper(filename).write({ "large": list(range(3000)), "name": "four-steps" })
+    assert sorted(os.listdir(filename)) == ["columns-3", COLUMNAR_HEADER_FILENAME]
+    assert ColumnarFileWrapper(filename).read()["large"].tolist() == list(range(3000))
+
+    # a crash of a former write between its renames leaves the directory renamed aside
+    os.rename(filename, f"{filename}.old")
+    assert ColumnarFileWrapper(filename).exists()
+    assert ColumnarFileWrapper(filename).read()["name"] == "four-steps"
+    assert sorted(os.listdir(tmp_path)) == ["recording.columns"]
+
+
+def test_flat_recursive_map_behaves_as_a_recursive_map():
+    root = { "linucb": { "plaintext": { "it-0": { "rewards": 1.0, "turns": [1, 2] } } }, "config": { "nb": 2 } }
+    flat_map, recursive_map = FlatRecursiveMap(root=root), RecursiveMap(root=root)
+    assert flat_map.export() == recursive_map.export() == root
+    assert flat_map.get(["linucb", "plaintext", "it-0", "turns"]) == [1, 2]
+    assert flat_map.get(["missing"], default="default") == "default"
+
+    # a sub-tree is a view: its updates are seen by the map
+    iteration = flat_map.get(["linucb", "plaintext", "it-0"])
+    iteration.put(["theta-mse"], 0.5)
+    assert flat_map[["linucb", "plaintext", "it-0", "theta-mse"]] == 0.5
+    assert list(flat_map.get(["linucb", "plaintext"]).keys()) == ["it-0"]
+    assert flat_map.has(["linucb", "plaintext"]) and not flat_map.has(["linucb", "masked"])
+
+    # a value replaces the whole sub-tree under its keys, and the other way round
+    flat_map[["linucb", "plaintext"]] = 3
+    assert flat_map.export()["linucb"] == { "plaintext": 3 }
+    assert not flat_map.has(["linucb", "plaintext", "it-0", "turns"])
+    flat_map[["config"]] = { "nb": { "iterations": 2 } }
+    assert flat_map.export() == { "linucb": { "plaintext": 3 }, "config": { "nb": { "iterations": 2 } } }
+
+
+def test_recording_cache_invalidates_a_file_rewritten_with_the_same_size(tmp_path):
+    for filename in [str(tmp_path / "recording.json"), str(tmp_path / "recording.json.columns")]:
+        cache = RecordingCache()
+        recording = Recording.new(filename=filename)
+        recording.root.put([LINUCB_ALGORITHM, "nb"], 1)
+        recording.export()
+        assert cache.get(filename).root.get([LINUCB_ALGORITHM, "nb"]) == 1
+        assert cache.get(filename).root.get([LINUCB_ALGORITHM, "nb"]) == 1
+
+        # the same size and, on a file system of coarse timestamps, the same modification time
+        status = os.stat(filename)
+        recording.root.put([LINUCB_ALGORITHM, "nb"], 2)
+        recording.export()
+        os.utime(filename, ns=(status.st_atime_ns, status.st_mtime_ns))
+        assert cache.get(filename).root.get([LINUCB_ALGORITHM, "nb"]) == 2
+        assert (cache.hits, cache.misses, cache.invalidations) == (1, 2, 1)
+        assert cache.nb_bytes == file_signature(filename)[-1]